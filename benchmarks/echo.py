@@ -0,0 +1,62 @@
+"""
+动作响应关联基准: uuid4 + wait_for 与 EchoRegistry 时间轮的每秒动作数对比
+
+在仓库根目录运行: python -m benchmarks.echo [动作数] [并发数]
+"""
+import asyncio
+import sys
+import time
+import uuid
+
+from onebot.echo import EchoRegistry
+
+
+async def legacy(total: int, concurrency: int) -> float:
+    # 原实现: 每个动作一个uuid4 echo, 由 wait_for 单独计时
+    pending = {}
+    loop = asyncio.get_running_loop()
+
+    async def call():
+        echo = uuid.uuid4().hex
+        future = loop.create_future()
+        pending[echo] = future
+        loop.call_soon(lambda: pending[echo].set_result({'echo': echo}))
+        try:
+            return await asyncio.wait_for(future, 10)
+        finally:
+            del pending[echo]
+
+    start = time.perf_counter()
+    for _ in range(total // concurrency):
+        await asyncio.gather(*(call() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def registry(total: int, concurrency: int) -> float:
+    echo_registry = EchoRegistry()
+    loop = asyncio.get_running_loop()
+
+    async def call():
+        echo, future = echo_registry.register(10)
+        loop.call_soon(echo_registry.resolve, echo, {'echo': echo})
+        try:
+            return await future
+        finally:
+            echo_registry.discard(echo)
+
+    start = time.perf_counter()
+    for _ in range(total // concurrency):
+        await asyncio.gather(*(call() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def main(total: int, concurrency: int):
+    print(f'动作数: {total}  并发: {concurrency}')
+    for name, bench in (('uuid4 + wait_for', legacy), ('EchoRegistry', registry)):
+        elapsed = await bench(total, concurrency)
+        print(f'{name:<18}{total / elapsed:>12,.0f} actions/s')
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*(args + [100000, 100][len(args):])))
@@ -0,0 +1,80 @@
+"""
+参数注入开销基准: 逐参数 await support/resolve 与预编译注入计划 resolve_sync 对比
+
+在仓库根目录运行: python -m benchmarks.injection [次数]
+"""
+import asyncio
+import sys
+import time
+from inspect import isawaitable
+
+from onebot import OneBot
+from onebot.parameter.arguments import GetGroupID, GetUserID, GetMessageID, GetText, GetAt
+from onebot.parameter.composite import PARAMETER_RESOLVER
+from onebot.scope import Scope
+
+
+async def handler(
+        app: OneBot,
+        group_id: int = GetGroupID(),
+        user_id: int = GetUserID(),
+        message_id: int = GetMessageID(),
+        text: str = GetText(),
+        at: set = GetAt()
+):
+    pass
+
+
+def make_scope() -> Scope:
+    request = {
+        'post_type': 'message', 'message_type': 'group', 'group_id': 1, 'user_id': 2, 'message_id': 3,
+        'self_id': 4, 'raw_message': 'hello', 'message': [],
+    }
+    scope = Scope(request, app=object(), router=None)
+    scope['text'] = ['hello']
+    scope['full_text'] = 'hello'
+    scope['at'] = {'4'}
+    return scope
+
+
+async def awaited(func, parameter, scope: Scope):
+    # 注入计划之前 support/resolve 均为协程, 依赖还要再经过 DependencyResolver 一层协程
+    result = func(parameter, scope)
+    return await result if isawaitable(result) else result
+
+
+async def resolve_awaited(resolvers, scope: Scope) -> list:
+    # 注入计划之前的做法: 每个参数都 await 解析器的 support 和 resolve
+    values = []
+    for parameter, resolver in resolvers:
+        if not await awaited(resolver.support, parameter, scope):
+            return None
+        values.append(await awaited(resolver.resolve, parameter, scope))
+    return values
+
+
+async def main(rounds: int):
+    scope = make_scope()
+    resolvers = PARAMETER_RESOLVER.get_function_resolvers(handler)
+    plan = PARAMETER_RESOLVER.compile(handler)
+    assert plan.is_sync
+    assert await resolve_awaited(resolvers, scope) == plan.resolve_sync(scope, [])
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await resolve_awaited(resolvers, scope)
+    before = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        plan.resolve_sync(scope, [])
+    compiled = (time.perf_counter() - start) / rounds
+
+    print(f'参数个数: {len(resolvers)}  次数: {rounds}')
+    print(f'逐参数 await:     {before * 1e6:.2f} us/handler')
+    print(f'resolve_sync:     {compiled * 1e6:.2f} us/handler')
+    print(f'加速比:           {before / compiled:.1f}x')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
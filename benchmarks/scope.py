@@ -0,0 +1,121 @@
+"""
+事件上下文内存基准: 以固定速率(默认 5000 条/秒)分发群消息, 对比每事件新建 dict 与对象池中的 Scope
+
+在仓库根目录运行: python -m benchmarks.scope [速率] [秒数]
+"""
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+from loguru import logger
+
+from onebot import OneBot
+from onebot.dispatcher import DISPATCHER
+from onebot.filter.impl.command import CommandPrefix
+from onebot.parameter.arguments import GetGroupID, GetText, GetAt, GetMessageChain, Depends
+from onebot.scope import SCOPE_POOL, Scope
+
+REQUEST = {
+    'post_type': 'message', 'message_type': 'group', 'group_id': 1, 'user_id': 2, 'self_id': 3, 'message_id': 4,
+    'raw_message': '查询 天气', 'sender': {'user_id': 2, 'nickname': 'user'},
+    'message': [
+        {'type': 'at', 'data': {'qq': '3'}},
+        {'type': 'text', 'data': {'text': '查询 天气'}},
+    ],
+}
+
+
+# 处理器执行次数, 注入失败时处理器不会执行, 用于校验基准确实跑通了完整的分发
+handled = 0
+
+
+async def city() -> str:
+    # Depends 的结果缓存在上下文的 extras 中
+    return '天气'
+
+
+def make_bot() -> OneBot:
+    bot = OneBot('localhost', 0)
+
+    @bot.listener([CommandPrefix('查询')])
+    async def handler(group_id: int = GetGroupID(), text: str = GetText(), at: set = GetAt(),
+                      chain: list = GetMessageChain(), name: str = Depends(city)):
+        global handled
+        handled += 1
+
+    return bot
+
+
+async def dispatch_dict(bot: OneBot, sizes: list):
+    # 原实现: 每个事件新建一个 dict 作为上下文
+    scope = {'request': REQUEST, 'app': bot, 'router': bot.router}
+    await DISPATCHER.handler(scope)
+    sizes.append(sys.getsizeof(scope))
+
+
+async def dispatch_pool(bot: OneBot, sizes: list):
+    await bot._dispatch(REQUEST)
+
+
+async def drive(dispatch, bot: OneBot, rate: int, seconds: float) -> dict:
+    sizes = []
+    batch = max(1, rate // 100)
+    interval = batch / rate
+    created = SCOPE_POOL.created
+    collections = gc.get_stats()[0]['collections']
+    loop = asyncio.get_running_loop()
+    start = next_tick = loop.time()
+    events = 0
+    while loop.time() - start < seconds:
+        for _ in range(batch):
+            await dispatch(bot, sizes)
+        events += batch
+        next_tick += interval
+        await asyncio.sleep(max(0.0, next_tick - loop.time()))
+    elapsed = loop.time() - start
+    scopes = SCOPE_POOL.created - created
+    return {
+        'events': events,
+        'rate': events / elapsed,
+        # 上下文容器本身每事件分配的字节数
+        'scope_bytes': (sum(sizes) if sizes else scopes * sys.getsizeof(Scope())) / events,
+        'gen0_gc': gc.get_stats()[0]['collections'] - collections,
+    }
+
+
+async def peak(dispatch, bot: OneBot, events: int) -> float:
+    """
+    分发期间的内存峰值(KiB), tracemalloc 开销较大, 不限速单独测量
+    """
+    sizes = []
+    tracemalloc.start()
+    for _ in range(events):
+        await dispatch(bot, sizes)
+    _, value = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value / 1024
+
+
+async def main(rate: int, seconds: float):
+    logger.remove()
+    bot = make_bot()
+    # 预热, 编译注入计划并填充对象池
+    for _ in range(100):
+        await bot._dispatch(REQUEST)
+    assert handled == 100, '处理器未执行, 检查注入参数'
+    print(f'目标速率: {rate}/s  时长: {seconds}s')
+    for name, dispatch in (('dict', dispatch_dict), ('Scope对象池', dispatch_pool)):
+        before = handled
+        result = await drive(dispatch, bot, rate, seconds)
+        assert handled - before == result['events'], '部分事件未执行处理器'
+        print(
+            f'{name:<10} 实际 {result["rate"]:,.0f}/s  上下文 {result["scope_bytes"]:.1f} B/事件  '
+            f'gen0 GC {result["gen0_gc"]} 次  峰值 {await peak(dispatch, bot, rate):.0f} KiB/{rate}事件'
+        )
+
+
+if __name__ == '__main__':
+    args = [float(arg) for arg in sys.argv[1:3]]
+    rate, seconds = args + [5000, 5][len(args):]
+    asyncio.run(main(int(rate), seconds))
@@ -0,0 +1,40 @@
+"""
+入站消息段解析基准: pydantic 模型与轻量槽类(compact)的每秒消息段数对比
+
+在仓库根目录运行: python -m benchmarks.segments [消息段数]
+"""
+import sys
+import time
+
+from onebot.dispatcher.impl.message import message_processors
+from onebot.scope import Scope
+
+MESSAGES = [
+    {'type': 'reply', 'data': {'id': '99'}},
+    {'type': 'at', 'data': {'qq': '2'}},
+    {'type': 'text', 'data': {'text': 'hello'}},
+    {'type': 'image', 'data': {'file': 'a.png', 'url': 'http://example.com/a.png', 'file_size': '1024'}},
+    {'type': 'face', 'data': {'id': '14'}},
+]
+
+
+def run(kind: str, total: int) -> float:
+    message_processors.use_segments(kind)
+    rounds = total // len(MESSAGES)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        message_processors.process(MESSAGES, Scope())
+    return rounds * len(MESSAGES) / (time.perf_counter() - start)
+
+
+def main(total: int):
+    print(f'消息段数: {total}  每条消息 {len(MESSAGES)} 段')
+    try:
+        for kind in ('pydantic', 'compact'):
+            print(f'{kind:<10}{run(kind, total):>12,.0f} segments/s')
+    finally:
+        message_processors.use_segments('pydantic')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
@@ -1,3 +1,5 @@
 from onebot.application import OneBot
+from onebot.runtime import MultiBot
+from onebot.server import OneBotServer
 from onebot.parameter.composite import PARAMETER_RESOLVER
 from onebot.parameter import arguments
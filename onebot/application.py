@@ -1,44 +1,135 @@
 import asyncio
 import json
 import sys
-import uuid
-from asyncio import Future
-from typing import Dict, List, Optional, Union
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
 
 import websockets
 from loguru import logger
-from websockets.exceptions import ConnectionClosed, ConnectionClosedOK, ConnectionClosedError
+from websockets.exceptions import ConnectionClosed
 
+from onebot.cache import MetadataCache
+from onebot.codec import CODEC, Codec, get_codec
+from onebot.connection import ActionConnection, ConnectionPool, ReconnectPolicy
 from onebot.dispatcher import DISPATCHER
-from onebot.exceptionals import AuthenticationError, SendMessageError
-from onebot.filter.interfaces import FilterInterface
-from onebot.routing import Router
+from onebot.echo import EchoRegistry
+from onebot.exceptionals import AuthenticationError, ConnectionLostError, SendMessageError
+from onebot.health import HealthMonitor
+from onebot.limiter import OutboundScheduler, Priority
+from onebot.pipeline import EventPipeline
+from onebot.routing import Router, RouterMixin
+from onebot.scope import SCOPE_POOL
+from onebot.singleflight import SingleFlight
+from onebot.timeout import TimeoutPolicy, deadline, remaining
+from onebot.worker import ProcessPipeline, current_relay
 from onebot.types import MessageBuilder, Login, Message, Friend, Group, GroupUser, Version
 
 
-class OneBot:
-    def __init__(self, host: str, port: int, token: str = None):
+def setup_logger(log_level: str):
+    """
+    删除默认日志,并设置日志
+    """
+    logger.remove()
+    logger.add(sys.stdout, level=log_level)
+
+
+class BatchResult(NamedTuple):
+    """
+    批量动作的单条结果
+    """
+    # 动作在批量中的下标
+    index: int
+    # 动作
+    request: dict
+    # 响应, 发送失败时为None
+    response: Optional[dict]
+    # 异常, 成功时为None
+    error: Optional[BaseException]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.response.get('status') == 'ok'
+
+
+class OneBot(RouterMixin):
+    def __init__(
+            self,
+            host: str = None,
+            port: int = None,
+            token: str = None,
+            pipeline: Union[EventPipeline, ProcessPipeline] = None,
+            codec: Union[Codec, str] = None,
+            binary_frames: bool = False,
+            lazy_segments: bool = False,
+            pool: ConnectionPool = None,
+            scheduler: OutboundScheduler = None,
+            cache: MetadataCache = None,
+            coalesce: bool = True,
+            timeouts: TimeoutPolicy = None,
+            event_timeout: float = None,
+            reconnect: ReconnectPolicy = None,
+            health: HealthMonitor = None,
+            router: Router = None
+    ):
+        """
+        :param host:            OneBot 地址, 为空时不主动连接, 由反向WebSocket或HTTP上报接入
+        :param port:            OneBot 端口
+        :param token:           访问令牌
+        :param pipeline:        事件处理管道
+        :param codec:           JSON编解码器或名称, 默认自动选择已安装的最快实现
+        :param binary_frames:   以二进制帧发送bytes编码结果, 需要OneBot实现支持
+        :param lazy_segments:   惰性解析消息段, 图片、语音等模型及消息链在参数解析时才创建
+        :param pool:            动作连接池, 为空时API请求走主连接
+        :param scheduler:       发送调度器, 为空时不限流
+        :param cache:           群、好友、群成员信息缓存, 为空时不缓存
+        :param coalesce:        合并相同的并发查询请求
+        :param timeouts:        动作超时配置
+        :param event_timeout:   单个事件的处理时限(秒), 限制处理器内所有动作的截止时间
+        :param reconnect:       断线重连策略
+        :param health:          连接健康监测, 心跳停滞时主动重连
+        :param router:          路由处理器, 多账号共享路由时传入
+        """
         self.loop = asyncio.get_event_loop()
         # Websocket
         self.ws = None
-        self.uri = f'ws://{host}:{port}'
+        self.uri = f'ws://{host}:{port}' if host is not None else None
         self.headers = [('Authorization', f'Bearer {token}')] if token else []
         self.connection_state = False
+        # 连接可用时置位, 断线期间发送的动作在此等待
+        self.connected = asyncio.Event()
+        self.reconnect = reconnect if reconnect is not None else ReconnectPolicy()
+        # 等待连接恢复的发送数
+        self.buffered = 0
+        # 反向连接断开时保留, 等待重连后重发的查询
+        self.held: List[tuple] = []
+        # 健康监测
+        self.health = health if health is not None else HealthMonitor()
+        # 动作连接池
+        self.pool = pool
+        # 发送限流
+        self.scheduler = scheduler
+        # 元数据缓存
+        self.cache = cache
+        # 查询请求合并
+        self.singleflight = SingleFlight() if coalesce else None
+        # 超时
+        self.timeouts = timeouts if timeouts is not None else TimeoutPolicy()
+        self.event_timeout = event_timeout
+        # 编解码
+        self.codec = codec if isinstance(codec, Codec) else (CODEC if codec is None else get_codec(codec))
+        self.binary_frames = binary_frames
+        # 消息段解析
+        self.lazy_segments = lazy_segments
         # 异步消息
-        self.echo_response: Dict[str, asyncio.Future] = {}
+        self.echo = EchoRegistry()
+        self.echo_response: Dict[int, asyncio.Future] = self.echo.pending
         # 路由处理器
-        self.router = Router()
-
-    def listener(self, filters: List[FilterInterface] = None, order: int = 0, continue_: bool = False):
-        def decorator(func):
-            self.router.register(func, filters, order, continue_)
-
-        if filters is None:
-            filters = []
-        return decorator
-
-    def on_event(self, event_type: str):
-        return self.router.on_event(event_type)
+        self.router = router if router is not None else Router()
+        # 事件处理管道
+        self.pipeline = pipeline if pipeline is not None else EventPipeline()
+        # 接收缓冲, 接收循环只写入此队列, 由投递任务按管道的溢出策略转交, 管道阻塞时不影响响应的接收
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        # 后台任务
+        self.tasks: List[asyncio.Task] = []
 
     def crontab(self, spec: str):
         def decorator(func):
@@ -48,55 +139,210 @@ class OneBot:
         return decorator
 
     async def _connect(self):
-        self.connection = False
+        self.connection_state = False
+        backoff = self.reconnect.backoff()
         while True:
             try:
                 self.ws = await websockets.connect(uri=self.uri, extra_headers=self.headers)
                 break
-            except (ConnectionClosedError, ConnectionClosed, ConnectionClosedOK, ConnectionRefusedError):
-                logger.error('连接失败, 等待10s重试...')
-                await asyncio.sleep(10)
+            except (ConnectionClosed, OSError):
+                delay = backoff.next()
+                logger.error('连接失败, 等待{:.1f}s重试...', delay)
+                await asyncio.sleep(delay)
         recv_data = await self.ws.recv()
-        json_data = json.loads(recv_data)
+        json_data = self.codec.loads(recv_data)
         if json_data.get('retcode') == 1403:
             raise AuthenticationError()
         logger.info('websocket连接成功！')
-        self.connection = True
+        self.connection_state = True
+        self.connected.set()
+        self.health.connection_made()
 
     async def _close(self):
-        if self.connection:
+        if self.connection_state:
             await self.ws.close()
 
     async def _recv(self):
         while True:
             try:
-                recv_data = await self.ws.recv()
-                logger.debug(recv_data)
-                scope = {
-                    'request': json.loads(recv_data),
-                    'app': self,
-                    'router': self.router
-                }
-                self.loop.create_task(DISPATCHER.handler(scope))
-            except (ConnectionClosedError, ConnectionClosedOK):
+                await self.receive(await self.ws.recv())
+            except ConnectionClosed:
+                logger.error('websocket连接断开, 正在重连...')
+                held = self.connection_lost()
                 await self._connect()
+                await self.replay(held)
+
+    async def receive(self, recv_data: Union[str, bytes]):
+        """
+        处理一帧上报数据, 正向、反向WebSocket及HTTP上报共用
+        :param recv_data:   原始数据
+        """
+        logger.debug(recv_data)
+        request = self.codec.loads(recv_data)
+        # 响应直接回调, 不进入队列, 避免处理器等待响应时队列阻塞
+        if 'echo' in request:
+            self.set_response(request['echo'], request)
+            return
+        # 心跳等元事件不排队, 保证存活判断及时
+        if request.get('post_type') == 'meta_event':
+            await self._dispatch(request)
+            return
+        # 不等待管道, 管道已满时接收循环仍需及时取回处理器等待的响应
+        self.inbox.put_nowait(request)
+
+    async def _feed(self):
+        """
+        将接收缓冲中的事件投递到事件处理管道, 管道已满且策略为block时在此等待
+        """
+        while True:
+            request = await self.inbox.get()
+            await self.pipeline.put(request)
+
+    async def attach(self, ws, actions: bool = True):
+        """
+        接入反向WebSocket连接, 连接断开后返回, 由客户端负责重连
+        :param ws:      已建立的连接
+        :param actions: 是否经此连接发送动作, Event 角色的连接只上报事件
+        """
+        if actions:
+            self.ws = ws
+            self.connection_state = True
+            self.connected.set()
+            self.health.connection_made()
+            # 重发上次断开时保留的查询
+            held, self.held = self.held, []
+            await self.replay(held)
+        try:
+            async for recv_data in ws:
+                await self.receive(recv_data)
+        except ConnectionClosed:
+            pass
+        finally:
+            if self.ws is ws:
+                logger.error('反向websocket连接断开, 等待客户端重连...')
+                self.held = self.connection_lost()
+
+    def connection_lost(self, connection: ActionConnection = None) -> List[tuple]:
+        """
+        连接断开, 不可重发的动作立即失败
+        :param connection: 断开的动作连接, 为空时为主连接
+        :return: 待重发的动作
+        """
+        if connection is None:
+            self.connection_state = False
+            self.connected.clear()
+            self.health.connection_lost()
+        held = []
+        for echo, message in self.echo.channel(connection):
+            if self.reconnect.replayable(message['action']):
+                held.append((echo, message))
+            else:
+                self.echo.fail(echo, ConnectionLostError())
+        return held
+
+    async def replay(self, held: List[tuple], connection: ActionConnection = None):
+        """
+        重连后重发动作
+        :param held:        connection_lost 返回的动作
+        :param connection:  重连后的动作连接, 为空时为主连接
+        """
+        for echo, message in held:
+            if echo not in self.echo.pending:
+                continue
+            data = self._encode(message)
+            try:
+                if connection is None:
+                    await self.ws.send(data)
+                else:
+                    await connection.send(data)
+            except ConnectionClosed:
+                return
+        if held:
+            logger.info('已重发 {} 个未完成的动作', len(held))
+
+    async def _watchdog(self, check_interval: float = 1):
+        """
+        心跳停滞时断开主连接, 由接收循环重连
+        """
+        while True:
+            await asyncio.sleep(check_interval)
+            if not self.health.stalled:
+                continue
+            self.health.stalls += 1
+            logger.warning('心跳停滞 {:.1f}s, 主动重连', self.health.snapshot()['since_heartbeat'])
+            self.health.connection_lost()
+            transport = getattr(self.ws, 'transport', None)
+            if transport is not None:
+                transport.abort()
+            else:
+                await self.ws.close()
+
+    async def _wait_connected(self, timeout: float):
+        if self.buffered >= self.reconnect.buffer_size:
+            raise ConnectionLostError('连接已断开, 发送缓冲已满')
+        self.buffered += 1
+        try:
+            await asyncio.wait_for(self.connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionLostError()
+        finally:
+            self.buffered -= 1
+
+    async def _dispatch(self, request: dict):
+        # 上下文对象复用, 处理完成后归还
+        scope = SCOPE_POOL.acquire(request, self, self.router)
+        try:
+            if self.event_timeout is None:
+                await DISPATCHER.handler(scope)
+                return
+            with deadline(self.event_timeout) as scope['deadline']:
+                await DISPATCHER.handler(scope)
+        finally:
+            SCOPE_POOL.release(scope)
+
+    async def start(self):
+        """
+        建立连接, 开始接收事件并执行启动事件
+        """
+        # 先启动事件处理管道, 多进程模式下工作进程不会继承连接
+        self.pipeline.start(self._dispatch)
+        self.tasks = [
+            self.loop.create_task(self._feed()),
+            self.loop.create_task(self._watchdog()),
+            self.loop.create_task(self.router.startup({'app': self})),
+        ]
+        # 被动模式下由服务端接入连接
+        if self.uri is None:
+            return
+        await self._connect()
+        if self.pool is not None:
+            await self.pool.open(self)
+        self.tasks.append(self.loop.create_task(self._recv()))
+
+    async def stop(self):
+        """
+        执行关闭事件并断开连接
+        """
+        await self.router.shutdown({'app': self})
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        await self.pipeline.stop()
+        if self.pool is not None:
+            await self.pool.close()
+        await self._close()
 
     def run(self, log_level='INFO'):
         """
         启动入口
         :param log_level:   日志等级
         """
-        # 删除默认日志,并设置日志
-        logger.remove()
-        logger.add(sys.stdout, level=log_level)
+        setup_logger(log_level)
         try:
-            self.loop.run_until_complete(self._connect())
-            self.loop.create_task(self._recv())
-            self.loop.create_task(self.router.startup({'app': self}))
+            self.loop.run_until_complete(self.start())
             self.loop.run_forever()
         except KeyboardInterrupt:
-            self.loop.run_until_complete(self.router.shutdown({'app': self}))
-            self.loop.run_until_complete(self._close())
+            self.loop.run_until_complete(self.stop())
 
     def set_response(self, echo: str, response: dict):
         """
@@ -105,15 +351,14 @@ class OneBot:
         :param response: 消息内容
         :return:
         """
-        if echo in self.echo_response:
-            self.echo_response[echo].set_result(response)
+        self.echo.resolve(echo, response)
 
     async def get_login_info(self) -> Login:
         """
         获取登录信息
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_login_info'
         })
         if response.get('status') == 'ok':
@@ -123,10 +368,12 @@ class OneBot:
             self,
             group_id: int,
             message: Union[str, MessageBuilder],
+            priority: Priority = None
     ) -> int:
         """
         :param group_id:    群号
         :param message:     消息
+        :param priority:    发送优先级, 默认回复消息优先
         :return:
         """
         if isinstance(message, str):
@@ -143,7 +390,7 @@ class OneBot:
                 'group_id': group_id,
                 'message': message_chain
             }
-        })
+        }, self._message_priority(message_chain, priority))
         if response.get('status') == 'ok':
             return response['data']['message_id']
         else:
@@ -152,7 +399,8 @@ class OneBot:
     async def send_private_msg(
             self,
             user_id: int,
-            message: Union[str, MessageBuilder]
+            message: Union[str, MessageBuilder],
+            priority: Priority = None
     ) -> int:
         if isinstance(message, str):
             message_chain = [{'type': 'text', 'data': {'text': message}}]
@@ -168,19 +416,92 @@ class OneBot:
                 'user_id': user_id,
                 'message': message_chain
             }
-        })
+        }, self._message_priority(message_chain, priority))
         if response.get('status') == 'ok':
             return response['data']['message_id']
         else:
             raise SendMessageError(json.dumps(response))
 
+    async def send_many(
+            self,
+            targets: Iterable[int],
+            message: Union[str, MessageBuilder],
+            message_type: str = 'group',
+            concurrency: int = 64,
+            priority: Priority = Priority.broadcast
+    ) -> AsyncIterator[BatchResult]:
+        """
+        批量发送同一条消息
+        :param targets:         群号或QQ号
+        :param message:         消息
+        :param message_type:    group 或 private
+        :param concurrency:     同时等待响应的最大请求数
+        :param priority:        发送优先级
+        :return: 按完成顺序返回的结果
+        """
+        if isinstance(message, str):
+            message_chain = [{'type': 'text', 'data': {'text': message}}]
+        elif isinstance(message, MessageBuilder):
+            message_chain = list(message)
+        else:
+            raise SendMessageError('message参数类型错误')
+        if message_type == 'group':
+            action, key = 'send_group_msg', 'group_id'
+        elif message_type == 'private':
+            action, key = 'send_private_msg', 'user_id'
+        else:
+            raise SendMessageError('message_type参数错误')
+        logger.info('批量发送消息 - 类型: {} 消息内容：{}', message_type, str(message))
+        messages = (
+            {'action': action, 'params': {key: target, 'message': message_chain}}
+            for target in targets
+        )
+        async for result in self.call_many(messages, concurrency, priority):
+            yield result
+
+    async def call_many(
+            self,
+            messages: Iterable[dict],
+            concurrency: int = 64,
+            priority: Priority = Priority.broadcast
+    ) -> AsyncIterator[BatchResult]:
+        """
+        批量发送动作, 连续发送不等待前一个响应
+        :param messages:    动作, 格式同 _send_message
+        :param concurrency: 同时等待响应的最大请求数
+        :param priority:    发送优先级
+        :return: 按完成顺序返回的结果
+        """
+        async def call(index: int, message: dict) -> BatchResult:
+            try:
+                return BatchResult(index, message, await self._send_message(message, priority), None)
+            except Exception as e:
+                return BatchResult(index, message, None, e)
+
+        pending = set()
+        try:
+            for index, message in enumerate(messages):
+                pending.add(self.loop.create_task(call(index, message)))
+                if len(pending) < concurrency:
+                    continue
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def get_msg(self, message_id: int) -> Optional[Message]:
         """
         获取消息
         :param message_id:  消息ID
         :return: MsgInfo实体类
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_msg',
             'params': {
                 'message_id': message_id
@@ -226,7 +547,11 @@ class OneBot:
         :param no_cache:    是否不使用缓存（使用缓存可能更新不及时，但响应更快）
         :return:
         """
-        response = await self._send_message({
+        key = ('friend_info', user_id)
+        cached = self._cache_get(key, no_cache)
+        if cached is not None:
+            return cached
+        response = await self._send_query({
             'action': 'get_stranger_info',
             'params': {
                 'user_id': user_id,
@@ -234,14 +559,14 @@ class OneBot:
             }
         })
         if response.get('status') == 'ok':
-            return Friend.model_validate(response['data'])
+            return self._cache_set(key, Friend.model_validate(response['data']))
 
     async def get_friend_list(self) -> List[Friend]:
         """
         获取好友列表
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_friend_list'
         })
         if response.get('status') == 'ok':
@@ -269,20 +594,24 @@ class OneBot:
         获取群列表
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_group_list'
         })
         if response.get('status') == 'ok':
             return [Group.model_validate(group_info) for group_info in response.get('data', [])]
 
-    async def get_group_info(self, group_id: int, no_cache: bool) -> Optional[Group]:
+    async def get_group_info(self, group_id: int, no_cache: bool = False) -> Optional[Group]:
         """
         获取群信息
         :param group_id:  群号
         :param no_cache:  是否不使用缓存（使用缓存可能更新不及时，但响应更快）
         :return:
         """
-        response = await self._send_message({
+        key = ('group_info', group_id)
+        cached = self._cache_get(key, no_cache)
+        if cached is not None:
+            return cached
+        response = await self._send_query({
             'action': 'get_group_info',
             'params': {
                 'group_id': group_id,
@@ -290,22 +619,103 @@ class OneBot:
             }
         })
         if response.get('status') == 'ok':
-            return Group.model_validate(response['data'])
+            return self._cache_set(key, Group.model_validate(response['data']))
 
-    async def get_group_member_list(self, group_id: int) -> List[GroupUser]:
+    async def get_group_member_list(self, group_id: int, no_cache: bool = False) -> List[GroupUser]:
         """
         获取群成员列表
         :param group_id:
+        :param no_cache:    是否不使用缓存
         :return:
         """
-        response = await self._send_message({
+        key = ('group_member_list', group_id)
+        cached = self._cache_get(key, no_cache)
+        if cached is not None:
+            return cached
+        response = await self._send_query({
             'action': 'get_group_member_list',
             'params': {
                 'group_id': group_id,
             }
         })
         if response.get('status') == 'ok':
-            return [GroupUser.model_validate(row) for row in response['data']]
+            return self._cache_set(key, [GroupUser.model_validate(row) for row in response['data']])
+
+    async def iter_group_member_list(
+            self,
+            group_id: int,
+            chunk_size: int = 200,
+            fields: Sequence[str] = None,
+            no_cache: bool = False
+    ) -> AsyncIterator[Union[GroupUser, dict]]:
+        """
+        逐个返回群成员, 按块校验并在块之间让出事件循环, 适用于成员较多的群
+        :param group_id:    群号
+        :param chunk_size:  每块校验的成员数
+        :param fields:      只返回指定字段的dict, 不创建模型也不写入缓存
+        :param no_cache:    是否不使用缓存
+        :return:
+        """
+        key = ('group_member_list', group_id)
+        cached = self._cache_get(key, no_cache)
+        if cached is not None and fields is None:
+            for member in cached:
+                yield member
+            return
+        response = await self._send_query({
+            'action': 'get_group_member_list',
+            'params': {
+                'group_id': group_id,
+            }
+        })
+        if response.get('status') != 'ok':
+            return
+        rows = response['data']
+        members = []
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            if fields is not None:
+                for row in chunk:
+                    yield {field: row.get(field) for field in fields}
+            else:
+                validated = [GroupUser.model_validate(row) for row in chunk]
+                members.extend(validated)
+                for member in validated:
+                    yield member
+            await asyncio.sleep(0)
+        # 完整遍历后写入缓存
+        if fields is None:
+            self._cache_set(key, members)
+
+    async def get_group_member_columns(
+            self,
+            group_id: int,
+            fields: Sequence[str],
+            chunk_size: int = 500
+    ) -> Optional[Dict[str, list]]:
+        """
+        按列获取群成员的指定字段, 不创建模型
+        :param group_id:    群号
+        :param fields:      字段名, 如 user_id、card、role
+        :param chunk_size:  每块处理的成员数, 块之间让出事件循环
+        :return: 字段名 -> 按成员顺序排列的值
+        """
+        response = await self._send_query({
+            'action': 'get_group_member_list',
+            'params': {
+                'group_id': group_id,
+            }
+        })
+        if response.get('status') != 'ok':
+            return None
+        rows = response['data']
+        columns = {field: [] for field in fields}
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            for field, column in columns.items():
+                column.extend([row.get(field) for row in chunk])
+            await asyncio.sleep(0)
+        return columns
 
     async def get_group_member_info(self, group_id: int, user_id: int, no_cache: bool = False) -> Optional[GroupUser]:
         """
@@ -313,10 +723,14 @@ class OneBot:
 
         :param group_id:    群号
         :param user_id:     QQ号
-        :param no_cache:    是否使用缓存
+        :param no_cache:    是否不使用缓存
         :return:
         """
-        response = await self._send_message({
+        key = ('group_member_info', group_id, user_id)
+        cached = self._cache_get(key, no_cache)
+        if cached is not None:
+            return cached
+        response = await self._send_query({
             'action': 'get_group_member_info',
             'params': {
                 'group_id': group_id,
@@ -325,7 +739,7 @@ class OneBot:
             }
         })
         if response.get('status') == 'ok':
-            return GroupUser.model_validate(response['data'])
+            return self._cache_set(key, GroupUser.model_validate(response['data']))
 
     async def set_group_add_request(self, flag: str, sub_type: str, approve: bool, reason: str = '') -> bool:
         """
@@ -472,7 +886,7 @@ class OneBot:
         获取版本信息
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_version_info',
         })
         if response.get('status') == 'ok':
@@ -483,7 +897,7 @@ class OneBot:
         获取运行状态
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_status',
         })
         return response.get('status') == 'ok'
@@ -493,7 +907,7 @@ class OneBot:
         检查是否可以发送图片
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_status',
         })
         return response['yes']
@@ -503,7 +917,7 @@ class OneBot:
         检查是否可以发送语音
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'can_send_record',
         })
         return response['yes']
@@ -514,7 +928,7 @@ class OneBot:
         :param file:    收到的图片文件名（消息段的 file 参数），如 6B4DE3DFD1BD271E3297859D41C530F5.jpg
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_image',
             'params': {
                 'file': file,
@@ -530,7 +944,7 @@ class OneBot:
         :param out_format:  要转换到的格式，目前支持 mp3、amr、wma、m4a、spx、ogg、wav、flac
         :return:
         """
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_record',
             'params': {
                 'file': file,
@@ -541,7 +955,7 @@ class OneBot:
             return response['data']['file']
 
     async def get_file(self, file: str) -> Optional[str]:
-        response = await self._send_message({
+        response = await self._send_query({
             'action': 'get_file',
             'params': {
                 'file_id': file,
@@ -560,13 +974,95 @@ class OneBot:
         })
         return response.get('status') == 'ok'
 
-    async def _send_message(self, message: dict):
-        message_id = uuid.uuid4().hex
+    async def _send_query(self, message: dict):
+        """
+        发送查询请求, 相同动作和参数的并发请求共享一次往返
+        """
+        if self.singleflight is None:
+            return await self._send_message(message)
+        key = (message['action'], tuple(sorted(message.get('params', {}).items())))
+        # 共享请求按动作超时执行, 每个调用方再按自己的截止时间等待
+        timeout = remaining(self.timeouts.get(message['action']))
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        return await self.singleflight.do(key, lambda: self._send_message(message), timeout)
+
+    def _cache_get(self, key: tuple, no_cache: bool):
+        if self.cache is None or no_cache:
+            return None
+        value = self.cache.get(key)
+        # 列表以元组缓存, 每次返回新列表, 调用方原地排序、过滤不影响缓存
+        if isinstance(value, tuple):
+            return list(value)
+        return value
+
+    def _cache_set(self, key: tuple, value):
+        if self.cache is not None and value is not None:
+            self.cache.set(key, tuple(value) if isinstance(value, list) else value)
+        return value
+
+    def _encode(self, message: dict) -> Union[str, bytes]:
+        data = self.codec.dumps(message)
+        if isinstance(data, bytes) and not self.binary_frames:
+            return data.decode()
+        return data
+
+    @staticmethod
+    def _message_priority(message_chain: list, priority: Optional[Priority]) -> Priority:
+        if priority is not None:
+            return priority
+        if message_chain and message_chain[0]['type'] == 'reply':
+            return Priority.reply
+        return Priority.normal
+
+    async def _send_message(self, message: dict, priority: Priority = Priority.normal, timeout: float = None):
+        # 动作超时受事件截止时间限制
+        timeout = remaining(self.timeouts.get(message['action']) if timeout is None else timeout)
+        if timeout <= 0:
+            raise asyncio.TimeoutError()
+        relay = current_relay()
+        if relay is not None:
+            # 工作进程中由连接所在进程代发
+            return await relay.call(message, priority, timeout)
+        if self.scheduler is not None:
+            # 排队等待发送许可的时间计入超时, 超时后放弃许可
+            started = self.loop.time()
+            await asyncio.wait_for(self.scheduler.schedule(message, priority), timeout)
+            timeout -= self.loop.time() - started
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+        connection = self.pool.select() if self.pool is not None else None
+        if connection is None and self.uri is None and self.ws is None:
+            # 被动模式下尚无动作连接, 如仅通过HTTP上报接入的账号
+            raise ConnectionLostError('没有可用的动作连接, 仅HTTP上报的账号无法发送动作')
+        if connection is None and not self.connected.is_set():
+            # 断线期间等待重连, 等待时间计入超时
+            started = self.loop.time()
+            await self._wait_connected(timeout)
+            timeout -= self.loop.time() - started
+            if timeout <= 0:
+                raise asyncio.TimeoutError()
+        message_id, future = self.echo.register(timeout, message, connection)
         message['echo'] = message_id
-        future = Future()
-        self.echo_response[message_id] = future
-        await self.ws.send(json.dumps(message))
         try:
-            return await asyncio.wait_for(future, 10)
+            try:
+                if connection is None:
+                    await self.ws.send(self._encode(message))
+                else:
+                    connection.inflight += 1
+                    await connection.send(self._encode(message))
+            except ConnectionClosed:
+                # 接收循环尚未发现断开时先标记, 后续动作不再选择该连接
+                if connection is not None:
+                    connection.connected = False
+                # 可重发的动作等待重连后重发, 其余立即失败
+                if not self.reconnect.replayable(message['action']):
+                    raise ConnectionLostError()
+            started = self.loop.time()
+            response = await future
+            self.health.record_latency(self.loop.time() - started)
+            return response
         finally:
-            del self.echo_response[message_id]
+            self.echo.discard(message_id)
+            if connection is not None:
+                connection.inflight -= 1
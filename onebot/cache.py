@@ -0,0 +1,81 @@
+"""
+本地元数据缓存
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    带过期时间的LRU缓存
+    """
+
+    def __init__(self, ttl: float = 60, maxsize: int = 4096):
+        """
+        :param ttl:     过期时间(秒)
+        :param maxsize: 最大条目数, 超出时淘汰最久未使用的条目
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.data: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self.data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        expires, value = item
+        if expires < time.monotonic():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        self.data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def delete(self, *keys: Hashable):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def clear(self):
+        self.data.clear()
+
+
+class MetadataCache(TTLCache):
+    """
+    群、好友、群成员信息缓存, 收到相关通知时失效
+    """
+
+    def invalidate_notice(self, request: dict):
+        """
+        根据通知事件失效缓存
+        :param request: 通知上报数据
+        """
+        notice_type = request.get('notice_type')
+        group_id = request.get('group_id')
+        user_id = request.get('user_id')
+        if notice_type in ('group_increase', 'group_decrease'):
+            self.delete(
+                ('group_info', group_id),
+                ('group_member_list', group_id),
+                ('group_member_info', group_id, user_id),
+            )
+        elif notice_type in ('group_admin', 'group_card'):
+            self.delete(
+                ('group_member_list', group_id),
+                ('group_member_info', group_id, user_id),
+            )
+        elif notice_type == 'friend_add':
+            self.delete(('friend_info', user_id))
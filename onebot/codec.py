@@ -0,0 +1,105 @@
+"""
+JSON编解码
+"""
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Type, Union
+
+
+class Codec(ABC):
+    """
+    JSON编解码器
+    """
+    name: str
+
+    @abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        pass
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        pass
+
+
+class StdlibCodec(Codec):
+    name = 'json'
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+
+class OrjsonCodec(Codec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj)
+
+
+class UjsonCodec(Codec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._loads = ujson.loads
+        self._dumps = ujson.dumps
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+    def dumps(self, obj: Any) -> str:
+        return self._dumps(obj, ensure_ascii=False)
+
+
+class MsgspecCodec(Codec):
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._decoder.decode(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+
+CODECS: Dict[str, Type[Codec]] = {
+    'json': StdlibCodec,
+    'orjson': OrjsonCodec,
+    'msgspec': MsgspecCodec,
+    'ujson': UjsonCodec,
+}
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """
+    获取编解码器
+    :param name: 编解码器名称, 为空时按 orjson、msgspec、ujson 顺序选择已安装的实现, 均未安装时使用标准库
+    :return:
+    """
+    if name is not None:
+        if name not in CODECS:
+            raise ValueError(f'未知的编解码器: {name}')
+        return CODECS[name]()
+    for codec in (OrjsonCodec, MsgspecCodec, UjsonCodec):
+        try:
+            return codec()
+        except ImportError:
+            continue
+    return StdlibCodec()
+
+
+CODEC = get_codec()
@@ -0,0 +1,158 @@
+import asyncio
+import random
+from typing import List, Optional, Union
+
+import websockets
+from loguru import logger
+from websockets.exceptions import ConnectionClosed
+
+
+class Backoff:
+    """
+    带抖动的指数退避
+    """
+
+    def __init__(self, initial: float, maximum: float, factor: float):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.delay = initial
+
+    def next(self) -> float:
+        """
+        下一次重试前的等待时间, 在 [delay/2, delay] 区间内随机
+        """
+        delay = self.delay
+        self.delay = min(self.maximum, self.delay * self.factor)
+        return delay * (0.5 + random.random() / 2)
+
+    def reset(self):
+        self.delay = self.initial
+
+
+class ReconnectPolicy:
+    """
+    断线重连策略
+    """
+
+    def __init__(
+            self,
+            initial: float = 0.5,
+            maximum: float = 30,
+            factor: float = 2,
+            replay: bool = True,
+            buffer_size: int = 1000
+    ):
+        """
+        :param initial:     首次重试等待时间(秒), 断线后第一次重连立即进行
+        :param maximum:     最大等待时间(秒)
+        :param factor:      退避倍数
+        :param replay:      重连后重发未收到响应的查询动作, 为False时这些动作立即失败
+        :param buffer_size: 断线期间最多等待连接恢复的发送数, 超出时立即失败
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.replay = replay
+        self.buffer_size = buffer_size
+
+    def backoff(self) -> Backoff:
+        return Backoff(self.initial, self.maximum, self.factor)
+
+    def replayable(self, action: str) -> bool:
+        """
+        动作是否可以安全重发, 仅重发无副作用的查询动作
+        """
+        return self.replay and (action.startswith('get_') or action.startswith('can_'))
+
+
+class ActionConnection:
+    """
+    动作连接, 只用于发送API请求和接收对应响应
+    """
+
+    def __init__(self, app, uri: str):
+        self.app = app
+        self.uri = uri
+        self.ws = None
+        self.task: Optional[asyncio.Task] = None
+        # 连接是否可用, 重连期间为False
+        self.connected = False
+        # 等待响应的请求数
+        self.inflight = 0
+
+    async def connect(self):
+        backoff = self.app.reconnect.backoff()
+        while True:
+            try:
+                self.ws = await websockets.connect(uri=self.uri, extra_headers=self.app.headers)
+                self.connected = True
+                return
+            except (ConnectionClosed, OSError):
+                delay = backoff.next()
+                logger.error('动作连接失败, 等待{:.1f}s重试...', delay)
+                await asyncio.sleep(delay)
+
+    async def send(self, data: Union[str, bytes]):
+        await self.ws.send(data)
+
+    async def _recv(self):
+        while True:
+            try:
+                response = self.app.codec.loads(await self.ws.recv())
+                if 'echo' in response:
+                    self.app.set_response(response['echo'], response)
+            except ConnectionClosed:
+                self.connected = False
+                held = self.app.connection_lost(self)
+                await self.connect()
+                await self.app.replay(held, self)
+
+    def start(self):
+        self.task = asyncio.get_event_loop().create_task(self._recv())
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+        self.connected = False
+        if self.ws is not None:
+            await self.ws.close()
+
+
+class ConnectionPool:
+    """
+    动作连接池, 事件仍由主连接接收, API请求分摊到多条连接
+    """
+
+    def __init__(self, size: int = 4, path: str = '/api'):
+        """
+        :param size:    连接数
+        :param path:    动作连接路径, OneBot v11 正向WebSocket的API端点为 /api
+        """
+        if size < 1:
+            raise ValueError('size必须大于0')
+        self.size = size
+        self.path = path
+        self.connections: List[ActionConnection] = []
+
+    async def open(self, app):
+        if self.connections:
+            return
+        self.connections = [ActionConnection(app, app.uri + self.path) for _ in range(self.size)]
+        await asyncio.gather(*(connection.connect() for connection in self.connections))
+        for connection in self.connections:
+            connection.start()
+        logger.info('动作连接池已建立, 连接数: {}', self.size)
+
+    def select(self) -> Optional[ActionConnection]:
+        """
+        选择等待响应最少的可用连接, 连接池未建立或全部重连中时返回None, 由主连接发送
+        """
+        connected = [connection for connection in self.connections if connection.connected]
+        if not connected:
+            return None
+        return min(connected, key=lambda connection: connection.inflight)
+
+    async def close(self):
+        await asyncio.gather(*(connection.close() for connection in self.connections), return_exceptions=True)
+        self.connections = []
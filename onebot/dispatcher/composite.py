@@ -1,7 +1,9 @@
-from typing import List
+from typing import Dict, List
 
 from onebot.dispatcher.impl.echo import EchoEventHandler
 from onebot.dispatcher.impl.message import MessageEventHandler
+from onebot.dispatcher.impl.meta import MetaEventHandler
+from onebot.dispatcher.impl.notice import NoticeEvent
 from onebot.dispatcher.impl.request import RequestEvent
 from onebot.dispatcher.interfaces import EventDispatcher
 
@@ -13,21 +15,36 @@ class EventComposite:
 
     def __init__(self):
         self.dispatchers: List[EventDispatcher] = []
+        # post_type -> 处理器
+        self.table: Dict[str, EventDispatcher] = {}
+        # 未声明post_type的处理器
+        self.fallback: List[EventDispatcher] = []
 
     async def support(self, scope: dict) -> bool:
         pass
 
     async def handler(self, scope: dict):
-        for handler in self.dispatchers:
+        handler = self.table.get(scope['request'].get('post_type'))
+        if handler is not None:
+            await handler.handle(scope)
+            return
+        for handler in self.fallback:
             if await handler.support(scope):
                 await handler.handle(scope)
                 return
 
     def add_handler(self, handler: EventDispatcher):
         self.dispatchers.append(handler)
+        if handler.post_type is None:
+            self.fallback.append(handler)
+        else:
+            # 同一上报类型先注册者优先
+            self.table.setdefault(handler.post_type, handler)
 
 
 DISPATCHER = EventComposite()
 DISPATCHER.add_handler(MessageEventHandler())
 DISPATCHER.add_handler(EchoEventHandler())
 DISPATCHER.add_handler(RequestEvent())
+DISPATCHER.add_handler(NoticeEvent())
+DISPATCHER.add_handler(MetaEventHandler())
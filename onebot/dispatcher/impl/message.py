@@ -1,105 +1,177 @@
 from abc import abstractmethod, ABC
-from typing import List, Type
+from typing import Dict, List, Optional, Type
 
 from loguru import logger
+from pydantic import BaseModel
 
 from onebot.dispatcher.interfaces import EventDispatcher
 from onebot.types import At, Text, Json, Image, Face, Record, File, Reply, Video
+from onebot.types import models, segments
+
+# 入站消息段类型, pydantic 为完整校验的模型, compact 为轻量的槽类
+SEGMENT_TYPES = {
+    'pydantic': models,
+    'compact': segments,
+}
 
 
 class Processor(ABC):
-    @abstractmethod
-    def process(self, data: dict, scope: dict) -> None:
-        pass
+    # 消息段模型, 为None时不加入消息链; 需提供 model_validate(data)
+    model: Optional[type] = None
 
     @property
     @abstractmethod
     def type(self) -> str:
         pass
 
+    def extract(self, data: dict, scope: dict) -> None:
+        """
+        提取无需模型校验的字段
+        """
+        pass
+
+    def collect(self, model: BaseModel, scope: dict) -> None:
+        """
+        保存模型化后的消息段
+        """
+        pass
+
+    def process(self, data: dict, scope: dict) -> None:
+        self.extract(data, scope)
+        if self.model is not None:
+            model = self.model.model_validate(data)
+            self.collect(model, scope)
+            scope['message_chain'].append(model)
+
 
 class AtProcessor(Processor):
     type = 'at'
+    model = At
 
-    def process(self, data: dict, scope: dict) -> None:
+    def extract(self, data: dict, scope: dict) -> None:
         if self.type not in scope:
             scope[self.type] = set()
         scope[self.type].add(data['qq'])
-        scope['message_chain'].append(At.model_validate(data))
 
 
 class TextProcessor(Processor):
     type = 'text'
+    model = Text
 
-    def process(self, data: dict, scope: dict) -> None:
+    def extract(self, data: dict, scope: dict) -> None:
         if self.type not in scope:
             scope[self.type] = list()
         scope[self.type].append(data['text'])
-        scope['message_chain'].append(Text.model_validate(data))
 
 
 class JsonProcessor(Processor):
     type = 'json'
+    model = Json
 
-    def process(self, data: dict, scope: dict) -> None:
+    def extract(self, data: dict, scope: dict) -> None:
         scope[self.type] = data['data']
-        scope['message_chain'].append(Json.model_validate(data))
 
 
 class ImageProcessor(Processor):
     type = 'image'
+    model = Image
 
-    def process(self, data: dict, scope: dict) -> None:
+    def collect(self, model: BaseModel, scope: dict) -> None:
         if self.type not in scope:
             scope[self.type] = list()
-        model = Image.model_validate(data)
         scope[self.type].append(model)
-        scope['message_chain'].append(model)
 
 
 class FaceProcessor(Processor):
     type = 'face'
+    model = Face
 
-    def process(self, data: dict, scope: dict) -> None:
+    def extract(self, data: dict, scope: dict) -> None:
         if self.type not in scope:
             scope[self.type] = list()
         scope[self.type].append(data['id'])
-        scope['message_chain'].append(Face.model_validate(data))
 
 
 class RecordProcessor(Processor):
     type = 'record'
+    model = Record
 
-    def process(self, data: dict, scope: dict) -> None:
-        model = Record.model_validate(data)
+    def collect(self, model: BaseModel, scope: dict) -> None:
         scope[self.type] = model
-        scope['message_chain'].append(model)
 
 
 class VideoProcessor(Processor):
     type = 'video'
+    model = Video
 
-    def process(self, data: dict, scope: dict) -> None:
-        model = Video.model_validate(data)
-        scope['video'] = model
-        scope['message_chain'].append(model)
+    def collect(self, model: BaseModel, scope: dict) -> None:
+        scope[self.type] = model
 
 
 class FileProcessor(Processor):
     type = 'file'
+    model = File
 
-    def process(self, data: dict, scope: dict) -> None:
-        model = File.model_validate(data)
-        scope['file'] = model
-        scope['message_chain'].append(model)
+    def collect(self, model: BaseModel, scope: dict) -> None:
+        scope[self.type] = model
 
 
 class ReplyProcessor(Processor):
     type = 'reply'
+    model = Reply
+
+    def extract(self, data: dict, scope: dict) -> None:
+        scope[self.type] = data['id']
 
-    def process(self, data: dict, scope: dict) -> None:
-        scope['reply'] = data['id']
-        scope['message_chain'].append(Reply.model_validate(data))
+
+class SegmentIndex:
+    """
+    惰性消息段索引, 按类型索引原始消息段, 模型在首次访问时才创建
+    """
+
+    def __init__(self, messages: list, strategies: Dict[str, Processor]):
+        self.messages = messages
+        self.strategies = strategies
+        # 消息类型 -> 原始消息段
+        self.types: Dict[str, List[dict]] = {}
+        for message in messages:
+            self.types.setdefault(message['type'], []).append(message['data'])
+        # 已创建的模型
+        self._models: Dict[int, BaseModel] = {}
+
+    def __contains__(self, message_type: str) -> bool:
+        return message_type in self.types
+
+    def _model(self, message_type: str, data: dict) -> BaseModel:
+        key = id(data)
+        model = self._models.get(key)
+        if model is None:
+            model = self.strategies[message_type].model.model_validate(data)
+            self._models[key] = model
+        return model
+
+    def materialize(self, message_type: str, scope: dict) -> None:
+        """
+        创建指定类型的模型并写入scope
+        :param message_type:    消息类型
+        :param scope:           上下文
+        """
+        strategy = self.strategies.get(message_type)
+        if strategy is None or strategy.model is None:
+            return
+        for data in self.types.get(message_type, ()):
+            strategy.collect(self._model(message_type, data), scope)
+
+    def chain(self) -> list:
+        """
+        模型化后的消息链
+        """
+        chain = []
+        for message in self.messages:
+            strategy = self.strategies.get(message['type'])
+            if strategy is not None and strategy.model is not None:
+                chain.append(self._model(message['type'], message['data']))
+        return chain
 
 
 class MessageProcessing:
@@ -110,20 +182,47 @@ class MessageProcessing:
             for processor in processors:
                 self.strategies[processor.type] = processor()
 
-    def process(self, messages: list, scope: dict):
-        scope['message_chain'] = []
-        for message in messages:
-            message_type = message['type']
-            if message_type not in self.strategies:
-                continue
-            strategy = self.strategies.get(message_type)
-            strategy.process(message['data'], scope)
+    def process(self, messages: list, scope: dict, lazy: bool = False):
+        """
+        处理消息段
+        :param messages:    消息段
+        :param scope:       上下文
+        :param lazy:        惰性模式, 只提取文本、at等字段, 模型由参数解析时按需创建
+        """
+        if lazy:
+            index = SegmentIndex(messages, self.strategies)
+            scope['segments'] = index
+            for message_type, rows in index.types.items():
+                strategy = self.strategies.get(message_type)
+                if strategy is None:
+                    continue
+                for data in rows:
+                    strategy.extract(data, scope)
+        else:
+            scope['message_chain'] = []
+            for message in messages:
+                message_type = message['type']
+                if message_type not in self.strategies:
+                    continue
+                strategy = self.strategies.get(message_type)
+                strategy.process(message['data'], scope)
         if 'text' in scope:
             scope['full_text'] = ''.join(scope['text'])
 
     def add_processor(self, processor: Type[Processor]):
         self.strategies[processor.type] = processor()
 
+    def use_segments(self, kind: str):
+        """
+        切换入站消息段类型, 按类名替换各处理器的模型, 找不到同名类型的处理器保持不变;
+        对所有账号生效, 应在模块顶层、启动前调用, 多进程模式下工作进程重新导入模块时同样生效
+        :param kind: pydantic 或 compact
+        """
+        module = SEGMENT_TYPES[kind]
+        for strategy in self.strategies.values():
+            if strategy.model is not None:
+                strategy.model = getattr(module, strategy.model.__name__, strategy.model)
+
 
 message_processors = MessageProcessing([
     TextProcessor,
@@ -139,15 +238,21 @@ message_processors = MessageProcessing([
 
 
 class MessageEventHandler(EventDispatcher):
+    post_type = 'message'
+
     async def support(self, scope: dict) -> bool:
         return scope['request'].get('post_type') == 'message'
 
     async def handle(self, scope: dict):
         request = scope['request']
+        router = scope['router']
+        # 预筛选, 无路由可能匹配时不再解析和记录日志
+        texts = [message['data']['text'] for message in request['message'] if message['type'] == 'text']
+        if not router.prescreen(request, ''.join(texts) if texts else None):
+            return
         if 'group_id' in request:
             logger.info("收到消息 - 群号: {group_id} 用户: {user_id} 消息内容: {raw_message}", **request)
         else:
             logger.info("收到消息 - 用户: {user_id} 消息内容: {raw_message}", **request)
-        router = scope['router']
-        message_processors.process(scope['request']['message'], scope)
+        message_processors.process(scope['request']['message'], scope, scope['app'].lazy_segments)
         await router(scope)
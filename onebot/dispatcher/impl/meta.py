@@ -0,0 +1,18 @@
+from loguru import logger
+
+from onebot.dispatcher.interfaces import EventDispatcher
+
+
+class MetaEventHandler(EventDispatcher):
+    post_type = 'meta_event'
+
+    async def support(self, scope: dict):
+        return scope['request'].get('post_type') == 'meta_event'
+
+    async def handle(self, scope: dict):
+        request = scope['request']
+        meta_event_type = request.get('meta_event_type')
+        if meta_event_type == 'heartbeat':
+            scope['app'].health.heartbeat(request)
+        elif meta_event_type == 'lifecycle':
+            logger.info('生命周期事件 - {sub_type}', sub_type=request.get('sub_type'))
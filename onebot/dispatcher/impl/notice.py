@@ -0,0 +1,47 @@
+from loguru import logger
+
+from onebot.dispatcher.interfaces import EventDispatcher
+from onebot.types import (
+    FriendAdd, FriendRecall, GroupAdmin, GroupBan, GroupCard, GroupDecrease, GroupIncrease, GroupRecall, GroupUpload,
+    OtherNotice, Poke
+)
+
+# 通知模型, 键为(notice_type, sub_type), sub_type为None时匹配全部子类型
+NOTICE_MODELS = {
+    ('group_upload', None): GroupUpload,
+    ('group_admin', None): GroupAdmin,
+    ('group_decrease', None): GroupDecrease,
+    ('group_increase', None): GroupIncrease,
+    ('group_ban', None): GroupBan,
+    ('friend_add', None): FriendAdd,
+    ('group_recall', None): GroupRecall,
+    ('friend_recall', None): FriendRecall,
+    ('group_card', None): GroupCard,
+    ('notify', 'poke'): Poke,
+}
+
+
+class NoticeEvent(EventDispatcher):
+    post_type = 'notice'
+
+    async def support(self, scope: dict):
+        return scope['request'].get('post_type') == 'notice'
+
+    async def handle(self, scope: dict):
+        request = scope['request']
+        app = scope['app']
+        if app.cache is not None:
+            app.cache.invalidate_notice(request)
+        notice_type = request.get('notice_type')
+        sub_type = request.get('sub_type')
+        # 无人订阅的通知不解析模型
+        routes = scope['router'].notice_routes(notice_type, sub_type)
+        if not routes:
+            return
+        # 未建模的通知以 OtherNotice 注入, 保证 GetNotice 处理器都能执行
+        model = NOTICE_MODELS.get((notice_type, sub_type)) or NOTICE_MODELS.get((notice_type, None)) or OtherNotice
+        try:
+            scope['notice'] = model.model_validate(request)
+        except ValueError as e:
+            logger.warning('通知解析失败 - {}: {}', notice_type, e)
+        await scope['router'].dispatch(scope, routes)
@@ -4,6 +4,8 @@ from onebot.dispatcher.interfaces import EventDispatcher
 
 
 class RequestEvent(EventDispatcher):
+    post_type = 'request'
+
     async def support(self, scope: dict):
         return scope['request'].get('post_type') == 'request'
 
@@ -1,10 +1,14 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 
 class EventDispatcher(ABC):
     """
     消息过滤器
     """
+    # 负责的上报类型, 组合器按此查表分发; 为None时按support逐个判断
+    post_type: Optional[str] = None
+
     @abstractmethod
     async def support(self, scope: dict):
         pass
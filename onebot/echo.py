@@ -0,0 +1,104 @@
+"""
+动作响应关联
+"""
+import asyncio
+from itertools import count
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class EchoRegistry:
+    """
+    动作响应关联, 使用自增整数作为echo, 超时由时间轮统一处理
+    """
+
+    def __init__(self, resolution: float = 0.1):
+        """
+        :param resolution: 时间轮刻度(秒), 即超时精度
+        """
+        self.resolution = resolution
+        self._counter = count(1)
+        # 等待响应的请求
+        self.pending: Dict[int, asyncio.Future] = {}
+        # echo -> (动作, 发送连接), 用于断线后重放
+        self.messages: Dict[int, Tuple[dict, Hashable]] = {}
+        # 时间轮, 到期刻度 -> echo
+        self._wheel: Dict[int, List[int]] = {}
+        self._cursor = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self):
+        return len(self.pending)
+
+    def register(self, timeout: float, message: dict = None, channel: Hashable = None) -> Tuple[int, asyncio.Future]:
+        """
+        登记一个等待响应的请求
+        :param timeout: 超时时间(秒), 到期后future抛出TimeoutError
+        :param message: 动作, 断线重放时使用
+        :param channel: 发送该动作的连接
+        :return: echo, future
+        """
+        loop = asyncio.get_event_loop()
+        echo = next(self._counter)
+        future = loop.create_future()
+        self.pending[echo] = future
+        if message is not None:
+            self.messages[echo] = (message, channel)
+        if self._task is None or self._task.done():
+            self._cursor = int(loop.time() / self.resolution)
+            self._task = loop.create_task(self._run(loop))
+        # 向上取整, 保证不早于超时时间到期
+        tick = max(-int(-(loop.time() + timeout) // self.resolution), self._cursor)
+        self._wheel.setdefault(tick, []).append(echo)
+        return echo, future
+
+    def resolve(self, echo: Any, response: dict) -> bool:
+        """
+        设置响应
+        :return: 是否有对应的请求
+        """
+        if isinstance(echo, str) and echo.isdigit():
+            echo = int(echo)
+        future = self.pending.pop(echo, None)
+        self.messages.pop(echo, None)
+        if future is None or future.done():
+            return False
+        future.set_result(response)
+        return True
+
+    def discard(self, echo: int):
+        self.pending.pop(echo, None)
+        self.messages.pop(echo, None)
+
+    def fail(self, echo: int, exc: BaseException):
+        future = self.pending.pop(echo, None)
+        self.messages.pop(echo, None)
+        if future is not None and not future.done():
+            future.set_exception(exc)
+
+    def channel(self, channel: Hashable) -> List[Tuple[int, dict]]:
+        """
+        经指定连接发送且仍在等待响应的动作
+        """
+        return [
+            (echo, message)
+            for echo, (message, sent_by) in list(self.messages.items())
+            if sent_by is channel and echo in self.pending
+        ]
+
+    async def _run(self, loop: asyncio.AbstractEventLoop):
+        pending = self.pending
+        wheel = self._wheel
+        try:
+            while pending:
+                await asyncio.sleep(self.resolution)
+                now = int(loop.time() / self.resolution)
+                while self._cursor <= now:
+                    for echo in wheel.pop(self._cursor, ()):
+                        future = pending.pop(echo, None)
+                        self.messages.pop(echo, None)
+                        if future is not None and not future.done():
+                            future.set_exception(asyncio.TimeoutError())
+                    self._cursor += 1
+        finally:
+            if not pending:
+                wheel.clear()
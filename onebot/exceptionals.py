@@ -25,6 +25,11 @@ class AuthenticationError(Exception):
         super().__init__("认证失败")
 
 
+class ConnectionLostError(Exception):
+    def __init__(self, msg: str = "连接已断开"):
+        super().__init__(msg)
+
+
 class BuildMessageError(Exception):
     def __init__(self, msg):
         self.msg = msg
@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+
+class HandlerExecutor:
+    """
+    同步处理器、依赖的专用执行器, 与事件循环默认线程池隔离
+    """
+
+    def __init__(self, threads: int = None, processes: int = 0):
+        """
+        :param threads:     线程数, 默认 min(32, CPU数 + 4)
+        :param processes:   进程数, 为0时CPU密集型处理器也在线程池执行
+        """
+        self.threads = threads or min(32, (os.cpu_count() or 1) + 4)
+        self.processes = processes
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 已提交未完成的任务数
+        self.pending = {'thread': 0, 'process': 0}
+        # 线程池中正在执行的任务数
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+
+    def configure(self, threads: int = None, processes: int = None):
+        """
+        调整池大小, 已创建的池在当前任务完成后关闭
+        :param threads:     线程数
+        :param processes:   进程数
+        """
+        if threads is not None:
+            self.threads = threads
+        if processes is not None:
+            self.processes = processes
+        self.shutdown(wait=False)
+
+    def _pool(self, cpu_bound: bool) -> Executor:
+        if cpu_bound and self.processes > 0:
+            if self._process_pool is None:
+                # 与 ProcessPipeline 一致使用 spawn, fork 会复制事件循环、连接和其他线程持有的锁
+                self._process_pool = ProcessPoolExecutor(
+                    self.processes, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._process_pool
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(self.threads, thread_name_prefix='onebot-handler')
+        return self._thread_pool
+
+    def _call(self, func: Callable, args: tuple):
+        with self._lock:
+            self.active += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    async def run(self, func: Callable, *args, cpu_bound: bool = False):
+        """
+        在执行器中运行同步函数
+        :param func:        同步函数, 进程池执行时需定义在模块顶层, 且启动代码位于 if __name__ == '__main__' 下
+        :param args:        参数, 进程池执行时需可序列化
+        :param cpu_bound:   CPU密集型, 配置了进程池时在子进程执行
+        :return: 函数返回值
+        """
+        pool = self._pool(cpu_bound)
+        kind = 'process' if isinstance(pool, ProcessPoolExecutor) else 'thread'
+        if kind == 'thread':
+            # 与 asyncio.to_thread 一致, 在线程中沿用调用方的上下文变量(截止时间、日志上下文等)
+            call = partial(contextvars.copy_context().run, self._call, func, args)
+        else:
+            call = partial(func, *args)
+        self.pending[kind] += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(pool, call)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.pending[kind] -= 1
+        self.completed += 1
+        return result
+
+    @property
+    def depth(self) -> int:
+        """
+        线程池排队等待的任务数
+        """
+        return max(0, self.pending['thread'] - self.active)
+
+    def stats(self) -> dict:
+        return {
+            'threads': self.threads,
+            'processes': self.processes,
+            'active': self.active,
+            'queued': self.depth,
+            'process_pending': self.pending['process'],
+            'completed': self.completed,
+            'failed': self.failed,
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=wait)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
+            self._process_pool = None
+
+
+EXECUTOR = HandlerExecutor()
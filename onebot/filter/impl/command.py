@@ -4,8 +4,33 @@ from onebot.filter.interfaces import FilterInterface
 
 
 class Command(FilterInterface):
+    """
+    命令完全匹配
+    """
+
     def __init__(self, command: str):
         self._command = command
 
+    @property
+    def command(self) -> str:
+        return self._command
+
+    async def support(self, scope: dict):
+        return scope.get('full_text') == self._command
+
+
+class CommandPrefix(FilterInterface):
+    """
+    命令前缀匹配
+    """
+
+    def __init__(self, prefix: str):
+        self._prefix = prefix
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
     async def support(self, scope: dict):
-        return scope['full_text'] == self._command
+        full_text = scope.get('full_text')
+        return full_text is not None and full_text.startswith(self._prefix)
@@ -12,9 +12,34 @@ class At(FilterInterface):
             return False
         return len(scope['at'] & self.numbers) > 0
 
+    def prescreen(self, request: dict) -> bool:
+        return any(message['type'] == 'at' for message in request.get('message', ()))
+
 
 class AtMe(FilterInterface):
     async def support(self, scope: dict) -> bool:
         if 'at' not in scope or 'request' not in scope:
             return False
         return str(scope['request']['self_id']) in scope['at']
+
+    def prescreen(self, request: dict) -> bool:
+        self_id = str(request.get('self_id'))
+        return any(
+            message['type'] == 'at' and str(message['data'].get('qq')) == self_id
+            for message in request.get('message', ())
+        )
+
+
+class InGroup(FilterInterface):
+    """
+    限定群号
+    """
+
+    def __init__(self, numbers: Set[int]):
+        self.numbers = numbers
+
+    async def support(self, scope: dict) -> bool:
+        return 'request' in scope and self.prescreen(scope['request'])
+
+    def prescreen(self, request: dict) -> bool:
+        return request.get('group_id') in self.numbers
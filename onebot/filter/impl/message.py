@@ -0,0 +1,25 @@
+from onebot.filter.interfaces import FilterInterface
+
+
+class GroupMessage(FilterInterface):
+    """
+    仅群聊消息
+    """
+
+    async def support(self, scope: dict) -> bool:
+        return 'request' in scope and self.prescreen(scope['request'])
+
+    def prescreen(self, request: dict) -> bool:
+        return request.get('message_type') == 'group'
+
+
+class PrivateMessage(FilterInterface):
+    """
+    仅私聊消息
+    """
+
+    async def support(self, scope: dict) -> bool:
+        return 'request' in scope and self.prescreen(scope['request'])
+
+    def prescreen(self, request: dict) -> bool:
+        return request.get('message_type') == 'private'
@@ -8,3 +8,10 @@ class FilterInterface(ABC):
     @abstractmethod
     async def support(self, scope: dict):
         pass
+
+    def prescreen(self, request: dict) -> bool:
+        """
+        基于原始上报数据的快速预筛选, 在消息解析前执行, 无法判断时必须返回True
+        :param request: 上报数据
+        """
+        return True
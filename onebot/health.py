@@ -0,0 +1,86 @@
+"""
+连接健康监测
+"""
+import time
+from typing import Optional
+
+
+class HealthMonitor:
+    """
+    连接健康状态, 根据心跳间隔判断连接是否存活, 根据动作往返时间估计延迟
+    """
+
+    def __init__(self, stall_factor: float = 3, smoothing: float = 0.2):
+        """
+        :param stall_factor:    超过心跳间隔的多少倍未收到心跳视为连接停滞
+        :param smoothing:       延迟指数平滑系数
+        """
+        self.stall_factor = stall_factor
+        self.smoothing = smoothing
+        # 连接是否建立
+        self.connected = False
+        # 心跳间隔(秒), 收到首个心跳前为None
+        self.interval: Optional[float] = None
+        # 最后一次心跳或连接建立的时间
+        self.last_heartbeat: Optional[float] = None
+        # 心跳上报的运行状态
+        self.status: dict = {}
+        # 动作往返延迟(秒)
+        self.latency: Optional[float] = None
+        self.heartbeats = 0
+        self.stalls = 0
+        self.reconnects = 0
+
+    def connection_made(self):
+        # 重连后重新计时
+        if self.last_heartbeat is not None:
+            self.reconnects += 1
+        self.connected = True
+        self.last_heartbeat = time.monotonic()
+
+    def connection_lost(self):
+        self.connected = False
+
+    def heartbeat(self, request: dict):
+        """
+        记录心跳
+        :param request: 心跳上报数据, interval 单位为毫秒
+        """
+        self.last_heartbeat = time.monotonic()
+        self.heartbeats += 1
+        interval = request.get('interval')
+        if interval:
+            self.interval = interval / 1000
+        self.status = request.get('status') or {}
+
+    def record_latency(self, rtt: float):
+        if self.latency is None:
+            self.latency = rtt
+        else:
+            self.latency += (rtt - self.latency) * self.smoothing
+
+    @property
+    def stalled(self) -> bool:
+        """
+        已建立连接但超过心跳间隔的 stall_factor 倍未收到心跳
+        """
+        if not self.connected or self.interval is None or self.last_heartbeat is None:
+            return False
+        return time.monotonic() - self.last_heartbeat > self.interval * self.stall_factor
+
+    @property
+    def alive(self) -> bool:
+        return self.connected and not self.stalled
+
+    def snapshot(self) -> dict:
+        return {
+            'connected': self.connected,
+            'alive': self.alive,
+            'interval': self.interval,
+            'since_heartbeat': None if self.last_heartbeat is None else time.monotonic() - self.last_heartbeat,
+            'latency': self.latency,
+            'heartbeats': self.heartbeats,
+            'stalls': self.stalls,
+            'reconnects': self.reconnects,
+            'status': self.status,
+        }
@@ -0,0 +1,164 @@
+"""
+发送限流
+"""
+import asyncio
+import heapq
+import time
+from collections import OrderedDict
+from enum import IntEnum
+from itertools import count
+from typing import Hashable, Iterable, List, Optional, Tuple
+
+
+class Priority(IntEnum):
+    """
+    发送优先级, 数值越小越优先
+    """
+    # 回复消息
+    reply = 0
+    # 普通消息
+    normal = 1
+    # 广播消息
+    broadcast = 2
+
+
+class TokenBucket:
+    """
+    令牌桶
+    """
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        :param rate:        每秒补充令牌数
+        :param capacity:    桶容量, 即允许的突发数量
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self) -> float:
+        """
+        尝试取出一个令牌
+        :return: 成功返回0, 否则返回需要等待的秒数
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            delay = self.consume()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+
+class OutboundScheduler:
+    """
+    发送调度器, 全局与单个目标各一个令牌桶, 全局令牌按优先级分配
+    """
+    # 需要限流的动作
+    ACTIONS = frozenset({
+        'send_msg',
+        'send_group_msg',
+        'send_private_msg',
+        'send_group_forward_msg',
+        'send_private_forward_msg',
+    })
+
+    def __init__(
+            self,
+            rate: float = 10,
+            burst: float = 10,
+            target_rate: float = 1,
+            target_burst: float = 3,
+            max_targets: int = 10000,
+            actions: Iterable[str] = None
+    ):
+        """
+        :param rate:            全局每秒发送数
+        :param burst:           全局突发数
+        :param target_rate:     单个群或用户每秒发送数
+        :param target_burst:    单个群或用户突发数
+        :param max_targets:     保留的目标令牌桶数量上限
+        :param actions:         需要限流的动作, 默认为发送消息类动作
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.target_rate = target_rate
+        self.target_burst = target_burst
+        self.max_targets = max_targets
+        self.actions = frozenset(actions) if actions is not None else self.ACTIONS
+        self.targets: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = count()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        等待全局令牌的请求数
+        """
+        return len(self._waiters)
+
+    @staticmethod
+    def target(message: dict) -> Optional[Hashable]:
+        params = message.get('params', {})
+        if 'group_id' in params:
+            return 'group', params['group_id']
+        if 'user_id' in params:
+            return 'private', params['user_id']
+        return None
+
+    def _target_bucket(self, key: Hashable) -> TokenBucket:
+        bucket = self.targets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.target_rate, self.target_burst)
+            self.targets[key] = bucket
+            if len(self.targets) > self.max_targets:
+                self.targets.popitem(last=False)
+        else:
+            self.targets.move_to_end(key)
+        return bucket
+
+    async def schedule(self, message: dict, priority: Priority = Priority.normal):
+        """
+        等待发送许可, 不需要限流的动作立即返回
+        :param message:     动作
+        :param priority:    优先级
+        """
+        if message.get('action') not in self.actions:
+            return
+        key = self.target(message)
+        if key is not None:
+            await self._target_bucket(key).acquire()
+        await self.acquire(priority)
+
+    async def acquire(self, priority: Priority = Priority.normal):
+        """
+        按优先级等待全局令牌
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._grant())
+        await future
+
+    async def _grant(self):
+        waiters = self._waiters
+        while waiters:
+            # 跳过已取消的请求
+            if waiters[0][2].done():
+                heapq.heappop(waiters)
+                continue
+            delay = self.bucket.consume()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            heapq.heappop(waiters)[2].set_result(None)
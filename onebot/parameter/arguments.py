@@ -1,10 +1,22 @@
-import asyncio
-import json
+from functools import partial
 from inspect import Parameter, isasyncgenfunction, isgeneratorfunction, iscoroutinefunction
 from typing import Any, Optional, Set, List
 
+from onebot.codec import CODEC
+from onebot.executor import EXECUTOR
 from onebot.parameter.interfaces import Dependency
-from onebot.types import Sender, Image, Record, File, FriendAddRequest, GroupInviteRequest
+from onebot.types import Sender, Image, Record, File, FriendAddRequest, GroupInviteRequest, Notice
+
+
+def _has_segment(scope: dict, key: str) -> bool:
+    return key in scope or key in scope.get('segments', ())
+
+
+def _get_segment(scope: dict, key: str) -> Any:
+    # 惰性模式下首次访问时创建模型
+    if key not in scope:
+        scope['segments'].materialize(key, scope)
+    return scope[key]
 
 
 class GetAPP(Dependency):
@@ -12,10 +24,10 @@ class GetAPP(Dependency):
     获取主程序
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return True
 
-    async def resolve(self, parameter: Parameter, scope: dict):
+    def resolve(self, parameter: Parameter, scope: dict):
         return scope['app']
 
 
@@ -24,10 +36,10 @@ class GetMessageID(Dependency):
     从消息中取JSON
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'request' in scope and 'message_id' in scope['request']
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
+    def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
         return scope['request'].get('message_id')
 
 
@@ -39,12 +51,12 @@ class GetGroupID(Dependency):
     def __init__(self, allow_null: bool = False):
         self.allow_null = allow_null
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         if self.allow_null:
             return True
         return 'request' in scope and 'group_id' in scope['request']
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
+    def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
         return scope.get('request', {}).get('group_id')
 
 
@@ -53,10 +65,10 @@ class GetUserID(Dependency):
     获取发送用户QQ
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'request' in scope and 'user_id' in scope['request']
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
+    def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
         return scope['request'].get('user_id')
 
 
@@ -65,10 +77,10 @@ class GetRobotID(Dependency):
     获取发送用户QQ
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'request' in scope and 'self_id' in scope['request']
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
+    def resolve(self, parameter: Parameter, scope: dict) -> Optional[int]:
         return scope['request']['self_id']
 
 
@@ -77,10 +89,10 @@ class GetSender(Dependency):
     获取发送人信息
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'request' in scope and 'sender' in scope['request']
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Optional[Sender]:
+    def resolve(self, parameter: Parameter, scope: dict) -> Optional[Sender]:
         if 'sender' in scope:
             return scope['sender']
         scope['sender'] = Sender.model_validate(scope['request']['sender'])
@@ -92,10 +104,10 @@ class GetQuote(Dependency):
     获取消息引用ID
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'request' in scope and 'reply' in scope['request']
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Any:
+    def resolve(self, parameter: Parameter, scope: dict) -> Any:
         return scope['context'].get('reply')
 
 
@@ -104,11 +116,13 @@ class GetMessageChain(Dependency):
     获取模型解析后的消息
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
-        return 'message_chain' in scope
+    def support(self, parameter: Parameter, scope: dict) -> bool:
+        return 'message_chain' in scope or 'segments' in scope
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> list:
-        return scope.get('message_chain')
+    def resolve(self, parameter: Parameter, scope: dict) -> list:
+        if 'message_chain' not in scope:
+            scope['message_chain'] = scope['segments'].chain()
+        return scope['message_chain']
 
 
 class GetAt(Dependency):
@@ -116,10 +130,10 @@ class GetAt(Dependency):
     获取at
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'at' in scope
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Set[str]:
+    def resolve(self, parameter: Parameter, scope: dict) -> Set[str]:
         return scope.get('at')
 
 
@@ -132,10 +146,10 @@ class GetText(Dependency):
         self.joint = joint
         self.delimiter = delimiter
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'text' in scope
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> List[str] | str | None:
+    def resolve(self, parameter: Parameter, scope: dict) -> List[str] | str | None:
         if self.joint:
             return self.delimiter.join(scope['text'])
         else:
@@ -150,14 +164,17 @@ class GetJSON(Dependency):
     def __init__(self, raw=False):
         self.raw = raw
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'json' in scope
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Optional[dict]:
+    def resolve(self, parameter: Parameter, scope: dict) -> Optional[dict]:
         if self.raw:
             return scope['json']
-        else:
-            return json.loads(scope['json'])
+        # 同一条消息只解析一次
+        if 'json_data' not in scope:
+            codec = getattr(scope.get('app'), 'codec', CODEC)
+            scope['json_data'] = codec.loads(scope['json'])
+        return scope['json_data']
 
 
 class GetImage(Dependency):
@@ -165,11 +182,11 @@ class GetImage(Dependency):
     获取图片
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
-        return 'image' in scope
+    def support(self, parameter: Parameter, scope: dict) -> bool:
+        return _has_segment(scope, 'image')
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Optional[List[Image]]:
-        return scope['image']
+    def resolve(self, parameter: Parameter, scope: dict) -> Optional[List[Image]]:
+        return _get_segment(scope, 'image')
 
 
 class GetFace(Dependency):
@@ -177,10 +194,10 @@ class GetFace(Dependency):
     获取表情
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'face' in scope
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> List[int]:
+    def resolve(self, parameter: Parameter, scope: dict) -> List[int]:
         return scope['face']
 
 
@@ -189,11 +206,11 @@ class GetRecord(Dependency):
     获取语音
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
-        return 'record' in scope
+    def support(self, parameter: Parameter, scope: dict) -> bool:
+        return _has_segment(scope, 'record')
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Record:
-        return scope['record']
+    def resolve(self, parameter: Parameter, scope: dict) -> Record:
+        return _get_segment(scope, 'record')
 
 
 class GetFile(Dependency):
@@ -201,11 +218,11 @@ class GetFile(Dependency):
     获取文件
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
-        return 'file' in scope
+    def support(self, parameter: Parameter, scope: dict) -> bool:
+        return _has_segment(scope, 'file')
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> File:
-        return scope['file']
+    def resolve(self, parameter: Parameter, scope: dict) -> File:
+        return _get_segment(scope, 'file')
 
 
 class GetFriendAddRequest(Dependency):
@@ -213,10 +230,10 @@ class GetFriendAddRequest(Dependency):
     好友请求
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'request' in scope and scope['request'].get('request_type') == 'friend'
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> FriendAddRequest:
+    def resolve(self, parameter: Parameter, scope: dict) -> FriendAddRequest:
         return FriendAddRequest.model_validate(scope['request'])
 
 
@@ -225,7 +242,7 @@ class GetGroupInviteRequest(Dependency):
     邀请进群
     """
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return (
                 'request' in scope and
                 scope['request'].get('post_type') == 'request' and
@@ -233,10 +250,22 @@ class GetGroupInviteRequest(Dependency):
                 scope['request'].get('sub_type') == 'invite'
         )
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> GroupInviteRequest:
+    def resolve(self, parameter: Parameter, scope: dict) -> GroupInviteRequest:
         return GroupInviteRequest.model_validate(scope['request'])
 
 
+class GetNotice(Dependency):
+    """
+    通知事件, 类型由notice_type和sub_type决定, 如GroupIncrease、GroupRecall、Poke
+    """
+
+    def support(self, parameter: Parameter, scope: dict) -> bool:
+        return 'notice' in scope
+
+    def resolve(self, parameter: Parameter, scope: dict) -> Notice:
+        return scope['notice']
+
+
 class Depends(Dependency):
     def __init__(self, func, use_cache=True, args=None, kwargs=None):
         # 方法
@@ -262,7 +291,7 @@ class Depends(Dependency):
         # 生成器哈希标识
         self.generator_key = hash((self.func, self.args, items_tuple, 'generator'))
 
-    async def support(self, parameter: Parameter, scpe: dict) -> bool:
+    def support(self, parameter: Parameter, scpe: dict) -> bool:
         return True
 
     async def resolve(self, parameter: Parameter, scope: dict) -> Any:
@@ -271,7 +300,7 @@ class Depends(Dependency):
         if self.is_generator:
             generator = self.func(*self.args, **self.kwargs)
             scope[self.generator_key] = generator
-            result = await asyncio.to_thread(next, generator)
+            result = await EXECUTOR.run(next, generator)
         elif self.is_asyncgen:
             generator = self.func(*self.args, **self.kwargs)
             scope[self.generator_key] = generator
@@ -279,7 +308,7 @@ class Depends(Dependency):
         elif self.is_async_func:
             result = await self.func(*self.args, **self.kwargs)
         else:
-            result = await asyncio.to_thread(self.func, *self.args, *self.kwargs)
+            result = await EXECUTOR.run(partial(self.func, *self.args, **self.kwargs))
         if self.use_cache:
             scope[self.cache_key] = result
         return result
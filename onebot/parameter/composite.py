@@ -1,13 +1,102 @@
-from inspect import Parameter, signature
-from typing import Any, List, Dict, Set, Callable, Tuple
+from inspect import Parameter, signature, iscoroutinefunction
+from typing import Any, List, Dict, Set, Callable, Tuple, Optional
 
 from onebot.exceptionals import ParameterError
-from onebot.parameter.interfaces import Resolver
+from onebot.parameter.interfaces import Resolver, Dependency
 
 from onebot.parameter.resolver.app import AppResolver
 from onebot.parameter.resolver.dependency import DependencyResolver
 
 
+# 未重写的close无需在处理结束后调用
+_NOOP_CLOSE = (Resolver.close, Dependency.close)
+
+
+class InjectionStep:
+    __slots__ = ('parameter', 'resolver', 'support', 'resolve', 'support_async', 'resolve_async', 'closable')
+
+    def __init__(self, parameter: Parameter, resolver: Resolver):
+        support, resolve, close = resolver.bind(parameter)
+        self.parameter = parameter
+        self.resolver = resolver
+        self.support = support
+        self.resolve = resolve
+        self.support_async = iscoroutinefunction(support)
+        self.resolve_async = iscoroutinefunction(resolve)
+        self.closable = getattr(close, '__func__', None) not in _NOOP_CLOSE
+
+
+class InjectionPlan:
+    """
+    预编译的参数注入计划
+    """
+
+    def __init__(self, steps: List[InjectionStep]):
+        self.steps = steps
+        # 全部为同步查找时无需await
+        self.is_sync = not any(step.support_async or step.resolve_async for step in steps)
+
+    def resolve_sync(
+            self,
+            scope: dict,
+            param_close: List[Tuple[Parameter, Resolver]],
+            required: bool = True
+    ) -> Optional[list]:
+        """
+        同步解析参数, 仅在is_sync为True时可用
+        :param scope:       上下文
+        :param param_close: 需要在处理结束后关闭的参数
+        :param required:    为True时任一参数不支持即返回None, 否则该参数取None
+        :return: 参数值列表
+        """
+        values = []
+        for step in self.steps:
+            parameter = step.parameter
+            if not step.support(parameter, scope):
+                if required:
+                    return None
+                values.append(None)
+                continue
+            values.append(step.resolve(parameter, scope))
+            if step.closable:
+                param_close.append((parameter, step.resolver))
+        return values
+
+    async def resolve(
+            self,
+            scope: dict,
+            param_close: List[Tuple[Parameter, Resolver]],
+            required: bool = True
+    ) -> Optional[list]:
+        """
+        解析参数
+        :param scope:       上下文
+        :param param_close: 需要在处理结束后关闭的参数
+        :param required:    为True时任一参数不支持即返回None, 否则该参数取None
+        :return: 参数值列表
+        """
+        if self.is_sync:
+            return self.resolve_sync(scope, param_close, required)
+        values = []
+        for step in self.steps:
+            parameter = step.parameter
+            supported = step.support(parameter, scope)
+            if step.support_async:
+                supported = await supported
+            if not supported:
+                if required:
+                    return None
+                values.append(None)
+                continue
+            value = step.resolve(parameter, scope)
+            if step.resolve_async:
+                value = await value
+            values.append(value)
+            if step.closable:
+                param_close.append((parameter, step.resolver))
+        return values
+
+
 class ResolverComposite:
     """
     参数解析器组合器
@@ -20,6 +109,8 @@ class ResolverComposite:
         self.func_resolvers_cache: Dict[Callable, List[Tuple[Parameter, Resolver]]] = {}
         # 不可解析方法缓存
         self.func_unsupported: Set[Callable] = set()
+        # 注入计划缓存
+        self.func_plans_cache: Dict[Callable, InjectionPlan] = {}
 
     def get_parameter_resolver(self, parameter: Parameter):
         for resolver in self.argument_resolves:
@@ -44,6 +135,18 @@ class ResolverComposite:
         self.func_resolvers_cache[func] = resolvers
         return resolvers
 
+    def compile(self, func: Callable) -> InjectionPlan:
+        """
+        编译方法的参数注入计划
+        :param func:
+        :return:
+        """
+        if func in self.func_plans_cache:
+            return self.func_plans_cache[func]
+        plan = InjectionPlan([InjectionStep(param, resolver) for param, resolver in self.get_function_resolvers(func)])
+        self.func_plans_cache[func] = plan
+        return plan
+
     def add_resolve(self, resolver: Resolver):
         """
         添加参数解决器
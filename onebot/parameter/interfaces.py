@@ -1,11 +1,13 @@
 """
 参数注入模板
+
+support/resolve 可以实现为同步方法, 纯查找的注入器应使用同步实现以走注入计划的快速路径
 """
 from __future__ import annotations
 
 from abc import abstractmethod, ABC
 from inspect import Parameter
-from typing import Any
+from typing import Any, Callable, Tuple
 
 
 class Resolver(ABC):
@@ -13,6 +15,14 @@ class Resolver(ABC):
     def support_parameter(self, parameter: Parameter) -> bool:
         pass
 
+    def bind(self, parameter: Parameter) -> Tuple[Callable, Callable, Callable]:
+        """
+        编译注入计划时获取实际执行的方法
+        :param parameter: 参数
+        :return: support, resolve, close
+        """
+        return self.support, self.resolve, self.close
+
     @abstractmethod
     async def support(self, parameter: Parameter, scope: dict) -> bool:
         pass
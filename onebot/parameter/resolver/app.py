@@ -9,8 +9,8 @@ class AppResolver(Resolver):
         from onebot import OneBot
         return parameter.annotation == OneBot
 
-    async def support(self, parameter: Parameter, scope: dict) -> bool:
+    def support(self, parameter: Parameter, scope: dict) -> bool:
         return 'app' in scope
 
-    async def resolve(self, parameter: Parameter, scope: dict) -> Any:
+    def resolve(self, parameter: Parameter, scope: dict) -> Any:
         return scope.get('app')
@@ -1,5 +1,5 @@
-from inspect import Parameter
-from typing import Any
+from inspect import Parameter, isawaitable
+from typing import Any, Callable, Tuple
 
 from onebot.parameter.interfaces import Resolver, Dependency
 
@@ -8,11 +8,17 @@ class DependencyResolver(Resolver):
     def support_parameter(self, parameter: Parameter) -> bool:
         return isinstance(parameter.default, Dependency)
 
+    def bind(self, parameter: Parameter) -> Tuple[Callable, Callable, Callable]:
+        dependency = parameter.default
+        return dependency.support, dependency.resolve, dependency.close
+
     async def support(self, parameter: Parameter, scope: dict) -> bool:
-        return await parameter.default.support(parameter, scope)
+        result = parameter.default.support(parameter, scope)
+        return await result if isawaitable(result) else result
 
     async def resolve(self, parameter: Parameter, scope: dict) -> Any:
-        return await parameter.default.resolve(parameter, scope)
+        result = parameter.default.resolve(parameter, scope)
+        return await result if isawaitable(result) else result
 
     async def close(self, parameter: Parameter, scope: dict, exc: Exception):
         await parameter.default.close(parameter, scope, exc)
@@ -0,0 +1,198 @@
+import asyncio
+from collections import deque
+from enum import Enum
+from itertools import count
+from typing import Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Union
+
+from loguru import logger
+
+
+class OverflowPolicy(Enum):
+    """
+    队列溢出策略
+    """
+    # 等待队列空位, 期间新事件暂存在 OneBot 的接收缓冲中, 不阻塞连接的接收循环
+    block = 'block'
+    # 丢弃队列中最旧的事件
+    drop_oldest = 'drop_oldest'
+    # 丢弃新到达的事件
+    drop_newest = 'drop_newest'
+
+
+def conversation_key(request: dict) -> Optional[Hashable]:
+    """
+    会话标识, 群消息按群号, 私聊按QQ号, 其余事件返回None
+    :param request: 上报数据
+    """
+    group_id = request.get('group_id')
+    if group_id is not None:
+        return 'group', group_id
+    user_id = request.get('user_id')
+    if user_id is not None:
+        return 'private', user_id
+    return None
+
+
+class EventPipeline:
+    """
+    事件处理管道, 有界队列 + 固定数量的消费者
+    """
+
+    def __init__(
+            self,
+            workers: int = 16,
+            queue_size: int = 1024,
+            overflow: Union[OverflowPolicy, str] = OverflowPolicy.block
+    ):
+        """
+        :param workers:     消费者数量
+        :param queue_size:  队列容量
+        :param overflow:    队列满时的处理策略
+        """
+        if workers < 1:
+            raise ValueError('workers必须大于0')
+        self.workers = workers
+        self.queue_size = queue_size
+        self.overflow = OverflowPolicy(overflow)
+        self.queues: List[asyncio.Queue] = []
+        self.tasks: List[asyncio.Task] = []
+        self.handler: Optional[Callable[[dict], Awaitable]] = None
+        # 丢弃事件数
+        self.dropped = 0
+        # 已处理事件数
+        self.processed = 0
+
+    @property
+    def depth(self) -> int:
+        """
+        当前排队事件数
+        """
+        return sum(queue.qsize() for queue in self.queues)
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'depth': self.depth,
+            'dropped': self.dropped,
+            'processed': self.processed,
+        }
+
+    def start(self, handler: Callable[[dict], Awaitable]):
+        """
+        启动消费者, 重复调用无效
+        :param handler: 事件处理方法, 参数为上报数据
+        """
+        if self.tasks:
+            return
+        loop = asyncio.get_event_loop()
+        self.handler = handler
+        self.queues = self._create_queues()
+        self.tasks = [
+            loop.create_task(self._worker(self.queues[i % len(self.queues)]))
+            for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def put(self, request: dict):
+        """
+        投递事件, 队列满时按溢出策略处理
+        :param request: 上报数据
+        """
+        queue = self._select(request)
+        if queue.full():
+            if self.overflow is OverflowPolicy.drop_newest:
+                self.dropped += 1
+                return
+            if self.overflow is OverflowPolicy.drop_oldest:
+                queue.get_nowait()
+                queue.task_done()
+                self.dropped += 1
+        await self._enqueue(queue, request)
+
+    async def _enqueue(self, queue: asyncio.Queue, request: dict):
+        await queue.put(request)
+
+    def _create_queues(self) -> List[asyncio.Queue]:
+        return [asyncio.Queue(self.queue_size)]
+
+    def _select(self, request: dict) -> asyncio.Queue:
+        return self.queues[0]
+
+    async def _get(self, queue: asyncio.Queue) -> dict:
+        return await queue.get()
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            request = await self._get(queue)
+            try:
+                await self.handler(request)
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                queue.task_done()
+                self.processed += 1
+
+
+class ShardedPipeline(EventPipeline):
+    """
+    分片事件处理管道, 同一会话的事件按到达顺序串行处理, 不同会话并行处理
+    """
+
+    def __init__(
+            self,
+            workers: int = 16,
+            queue_size: int = 1024,
+            overflow: Union[OverflowPolicy, str] = OverflowPolicy.block,
+            key: Callable[[dict], Optional[Hashable]] = conversation_key
+    ):
+        """
+        :param workers:     分片数量, 每个分片一个消费者
+        :param queue_size:  每个分片的容量
+        :param overflow:    分片队列满时的处理策略, block时只有该分片的事件等待, 不影响其他分片
+        :param key:         分片键, 返回None的事件轮询分配
+        """
+        super().__init__(workers, queue_size, overflow)
+        self.key = key
+        self._round_robin = count()
+        # 分片已满时等待入队的事件, 以分片队列为键
+        self.backlogs: Dict[asyncio.Queue, Deque[dict]] = {}
+
+    @property
+    def depth(self) -> int:
+        return super().depth + sum(len(backlog) for backlog in self.backlogs.values())
+
+    def _create_queues(self) -> List[asyncio.Queue]:
+        queues = [asyncio.Queue(self.queue_size) for _ in range(self.workers)]
+        self.backlogs = {queue: deque() for queue in queues}
+        return queues
+
+    async def _enqueue(self, queue: asyncio.Queue, request: dict):
+        """
+        不等待分片空位, 一个会话积压时其他会话照常投递
+        """
+        backlog = self.backlogs[queue]
+        # 已有积压时排在积压之后, 保证同一分片内的顺序
+        if backlog or queue.full():
+            backlog.append(request)
+            return
+        queue.put_nowait(request)
+
+    async def _get(self, queue: asyncio.Queue) -> dict:
+        request = await queue.get()
+        backlog = self.backlogs[queue]
+        if backlog:
+            queue.put_nowait(backlog.popleft())
+        return request
+
+    def _select(self, request: dict) -> asyncio.Queue:
+        key = self.key(request)
+        if key is None:
+            index = next(self._round_robin)
+        else:
+            index = hash(key)
+        return self.queues[index % len(self.queues)]
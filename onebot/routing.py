@@ -1,23 +1,63 @@
-import asyncio
-from typing import Callable, List, Tuple
+import heapq
+from bisect import insort
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional, Tuple
 from inspect import iscoroutinefunction, Parameter
 
 import aiocron
 from loguru import logger
 
+from onebot.exceptionals import ParameterError
+from onebot.executor import EXECUTOR
+from onebot.filter.impl.command import Command, CommandPrefix
 from onebot.filter.interfaces import FilterInterface
 from onebot.parameter import Resolver
+from onebot.parameter.arguments import GetAPP
+from onebot.parameter.resolver.app import AppResolver
 from onebot.parameter.composite import PARAMETER_RESOLVER
 
 
 class Route:
-    def __init__(self, func: Callable, filters: List[FilterInterface], order: int, continue_: bool):
+    def __init__(
+            self,
+            func: Callable,
+            filters: List[FilterInterface],
+            order: int,
+            continue_: bool,
+            seq: int = 0,
+            cpu_bound: bool = False
+    ):
         self.func = func
         self.filters = filters
         self.is_async = iscoroutinefunction(func)
         self.resolvers = PARAMETER_RESOLVER.get_function_resolvers(func)
+        # 参数注入计划
+        self.plan = PARAMETER_RESOLVER.compile(func)
         self.order = order
         self.continue_ = continue_
+        # 同步处理器是否交给进程池
+        self.cpu_bound = cpu_bound
+        if cpu_bound:
+            self._check_cpu_bound()
+        # 排序键, 同优先级按注册顺序
+        self.key = (order, seq)
+
+    def _check_cpu_bound(self):
+        """
+        进程池中执行的处理器参数需可序列化, 不能注入app, 返回值也无法用于回复
+        """
+        if self.is_async:
+            raise ValueError(f'cpu_bound 仅适用于同步处理器, 函数: {self.func.__name__}')
+        for step in self.plan.steps:
+            if isinstance(step.resolver, AppResolver) or isinstance(step.parameter.default, GetAPP):
+                raise ParameterError('cpu_bound 处理器不能注入app, 请在异步处理器中通过 EXECUTOR.run 执行计算后回复',
+                                     self.func, step.parameter)
+
+    def prescreen(self, request: dict) -> bool:
+        for f in self.filters:
+            if not f.prescreen(request):
+                return False
+        return True
 
     async def matches(self, scope: dict):
         for f in self.filters:
@@ -26,61 +66,172 @@ class Route:
         return True
 
     async def handle(self, scope: dict, param_close: List[Tuple[Parameter, Resolver]]):
-        param_value = []
-        for param, resolver in self.resolvers:
-            if not await resolver.support(param, scope):
-                return
-            param_value.append(await resolver.resolve(param, scope))
-            param_close.append((param, resolver))
+        plan = self.plan
+        if plan.is_sync:
+            param_value = plan.resolve_sync(scope, param_close)
+        else:
+            param_value = await plan.resolve(scope, param_close)
+        if param_value is None:
+            return
+        if self.is_async:
+            await self.func(*param_value)
         else:
-            if self.is_async:
-                await self.func(*param_value)
-            else:
-                await asyncio.to_thread(self.func, *param_value)
+            await EXECUTOR.run(self.func, *param_value, cpu_bound=self.cpu_bound)
 
 
 class Event:
     def __init__(self, func: Callable, event_type: str):
         self.func: Callable = func
         self.event_type: str = event_type
-        self.parameters = PARAMETER_RESOLVER.get_parameter_resolver(func)
+        self.plan = PARAMETER_RESOLVER.compile(func)
         self.is_async = iscoroutinefunction(func)
 
-    async def __call__(self, scope: dict, after_close_param: List[Parameter]):
-        param_values = []
-        for param in self.parameters:
-            if await PARAMETER_RESOLVER.support(param, scope):
-                param_values.append(await PARAMETER_RESOLVER.resolve(param, scope))
-                after_close_param.append(param)
-            else:
-                param_values.append(None)
+    async def __call__(self, scope: dict, after_close_param: List[Tuple[Parameter, Resolver]]):
+        param_values = await self.plan.resolve(scope, after_close_param, required=False)
         if self.is_async:
             await self.func(*param_values)
         else:
-            await asyncio.to_thread(self.func, *param_values)
+            await EXECUTOR.run(self.func, *param_values)
+
+
+route_key = attrgetter('key')
+
+
+class RouteIndex:
+    """
+    路由索引, 注册时预编译, 按消息文本快速取出候选路由
+    """
+
+    def __init__(self):
+        # 命令完全匹配
+        self.commands: Dict[str, List[Route]] = {}
+        # 命令前缀树, 键None存放在该节点结束的路由
+        self.prefixes: dict = {}
+        # 无法索引的路由
+        self.fallback: List[Route] = []
+
+    def add(self, route: Route):
+        for f in route.filters:
+            if isinstance(f, Command):
+                insort(self.commands.setdefault(f.command, []), route, key=route_key)
+                return
+            if isinstance(f, CommandPrefix):
+                node = self.prefixes
+                for char in f.prefix:
+                    node = node.setdefault(char, {})
+                insort(node.setdefault(None, []), route, key=route_key)
+                return
+        insort(self.fallback, route, key=route_key)
+
+    def candidates(self, text: Optional[str]) -> List[Route]:
+        """
+        获取候选路由, 保持order和注册顺序
+        :param text: 消息全文, 无文本时为None
+        :return:
+        """
+        if text is None:
+            return self.fallback
+        matched = []
+        routes = self.commands.get(text)
+        if routes:
+            matched.append(routes)
+        node = self.prefixes
+        if None in node:
+            matched.append(node[None])
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                matched.append(node[None])
+        if not matched:
+            return self.fallback
+        matched.append(self.fallback)
+        return list(heapq.merge(*matched, key=route_key))
 
 
 class Router:
     def __init__(self):
         self.routes: List[Route] = []
+        self.index = RouteIndex()
+        # 通知路由, 键为(notice_type, sub_type), sub_type为None时匹配全部子类型
+        self.notices: Dict[Tuple[str, Optional[str]], List[Route]] = {}
         self.on_startup: List[Event] = []
         self.on_shutdown: List[Event] = []
 
-    def register(self, func: Callable, filters: List[FilterInterface], order: int, continue_: bool):
+    def register(
+            self,
+            func: Callable,
+            filters: List[FilterInterface] = None,
+            order: int = 0,
+            continue_: bool = False,
+            cpu_bound: bool = False
+    ):
         route = Route(
             func=func,
-            filters=filters,
+            filters=filters if filters is not None else [],
             order=order,
-            continue_=continue_
+            continue_=continue_,
+            seq=len(self.routes),
+            cpu_bound=cpu_bound
         )
         self.routes.append(route)
-        self.routes.sort(key=lambda r: r.order)
+        self.routes.sort(key=route_key)
+        self.index.add(route)
+
+    def prescreen(self, request: dict, text: Optional[str]) -> bool:
+        """
+        消息是否可能被某个路由处理, 用于在解析消息前丢弃无人处理的消息
+        :param request: 上报数据
+        :param text:    消息全文, 无文本时为None
+        """
+        for route in self.index.candidates(text):
+            if route.prescreen(request):
+                return True
+        return False
+
+    def notice(
+            self,
+            func: Callable,
+            notice_type: str,
+            sub_type: str = None,
+            filters: List[FilterInterface] = None,
+            order: int = 0,
+            continue_: bool = False,
+            cpu_bound: bool = False
+    ):
+        route = Route(
+            func=func,
+            filters=filters if filters is not None else [],
+            order=order,
+            continue_=continue_,
+            seq=sum(map(len, self.notices.values())),
+            cpu_bound=cpu_bound
+        )
+        insort(self.notices.setdefault((notice_type, sub_type), []), route, key=route_key)
+
+    def notice_routes(self, notice_type: str, sub_type: Optional[str]) -> List[Route]:
+        """
+        获取通知路由, 保持order和注册顺序
+        :param notice_type: 通知类型
+        :param sub_type:    事件子类型
+        """
+        generic = self.notices.get((notice_type, None))
+        if sub_type is None:
+            return generic or []
+        exact = self.notices.get((notice_type, sub_type))
+        if exact and generic:
+            return list(heapq.merge(exact, generic, key=route_key))
+        return exact or generic or []
 
     async def __call__(self, scope: dict):
+        await self.dispatch(scope, self.index.candidates(scope.get('full_text')))
+
+    async def dispatch(self, scope: dict, routes: List[Route]):
         after_close_param = []
         exc = None
         try:
-            for route in self.routes:
+            for route in routes:
                 if await route.matches(scope):
                     await route.handle(scope, after_close_param)
                     if not route.continue_:
@@ -119,7 +270,7 @@ class Router:
                 logger.exception(e)
         for param, resolver in after_close_param:
             try:
-                await resolver.close(param, {})
+                await resolver.close(param, scope, None)
             except Exception as e:
                 logger.exception(e)
 
@@ -132,23 +283,84 @@ class Router:
     @staticmethod
     def crontab(func: Callable, spec: str, scope: dict):
         async def crontab():
-            param_value = []
-            for param, resolver in parameter_resolver:
-                param_value.append(await resolver.resolve(param, scope))
-            else:
+            param_close = []
+            exc = None
+            try:
+                param_value = await plan.resolve(scope, param_close, required=False)
                 if method_async_state:
                     await func(*param_value)
                 else:
-                    await asyncio.create_task(*param_value)
-            for param, resolver in parameter_resolver:
+                    await EXECUTOR.run(func, *param_value)
+            except Exception as e:
+                logger.exception(e)
+                exc = e
+            for param, resolver in param_close:
                 try:
-                    await resolver.close(param, scope)
+                    await resolver.close(param, scope, exc)
                 except Exception as e:
                     logger.exception(e)
 
-        # 预缓存参数列表
-        parameter_resolver = PARAMETER_RESOLVER.get_function_resolvers(func)
+        # 预编译参数注入计划
+        plan = PARAMETER_RESOLVER.compile(func)
         # 方法是否为异步
         method_async_state = iscoroutinefunction(func)
         # 启动定时任务
         aiocron.crontab(spec, crontab)
+
+
+class RouterMixin:
+    """
+    处理器注册装饰器, 注册到实例的 router 上, 单账号与多账号运行时共用
+    """
+    router: Router
+
+    def listener(
+            self,
+            filters: List[FilterInterface] = None,
+            order: int = 0,
+            continue_: bool = False,
+            cpu_bound: bool = False
+    ):
+        """
+        注册消息处理器
+        :param filters:     过滤器
+        :param order:       优先级, 越小越先执行
+        :param continue_:   处理后是否继续匹配后续处理器
+        :param cpu_bound:   CPU密集型同步处理器, 执行器配置了进程池时在子进程执行, 注入的参数需可序列化且不能注入app;
+                            需要回复时应使用异步处理器, 以 await EXECUTOR.run(func, *args, cpu_bound=True) 取得计算结果后发送
+        """
+        def decorator(func):
+            self.router.register(func, filters, order, continue_, cpu_bound)
+            return func
+
+        return decorator
+
+    def on_notice(
+            self,
+            notice_type: str,
+            sub_type: str = None,
+            filters: List[FilterInterface] = None,
+            order: int = 0,
+            continue_: bool = False,
+            cpu_bound: bool = False
+    ):
+        """
+        注册通知处理器, 按通知类型直接查表, 不经过消息路由
+        :param notice_type: 通知类型, 如group_increase、group_recall、notify
+        :param sub_type:    事件子类型, 为空时匹配全部子类型
+        :param filters:     过滤器
+        :param order:       优先级, 越小越先执行
+        :param continue_:   处理后是否继续匹配后续处理器
+        :param cpu_bound:   CPU密集型同步处理器, 同 listener
+        """
+        def decorator(func):
+            self.router.notice(func, notice_type, sub_type, filters, order, continue_, cpu_bound)
+            return func
+
+        return decorator
+
+    def on_event(self, event_type: str):
+        """
+        启动、关闭事件, 多账号时每个账号各执行一次
+        """
+        return self.router.on_event(event_type)
@@ -0,0 +1,47 @@
+import asyncio
+from typing import List
+
+from onebot.application import OneBot, setup_logger
+from onebot.routing import Router, RouterMixin
+
+
+class MultiBot(RouterMixin):
+    """
+    多账号运行时, 多个账号连接共享同一个事件循环、路由和事件分发器
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_event_loop()
+        self.router = Router()
+        self.bots: List[OneBot] = []
+
+    def add_bot(self, host: str, port: int, token: str = None, **kwargs) -> OneBot:
+        """
+        添加账号, 处理器中注入的app为事件来源的账号
+        :param host:    OneBot 地址
+        :param port:    OneBot 端口
+        :param token:   访问令牌
+        :param kwargs:  OneBot 的其余参数
+        :return:
+        """
+        bot = OneBot(host, port, token, router=self.router, **kwargs)
+        self.bots.append(bot)
+        return bot
+
+    async def start(self):
+        await asyncio.gather(*(bot.start() for bot in self.bots))
+
+    async def stop(self):
+        await asyncio.gather(*(bot.stop() for bot in self.bots), return_exceptions=True)
+
+    def run(self, log_level='INFO'):
+        """
+        启动入口
+        :param log_level:   日志等级
+        """
+        setup_logger(log_level)
+        try:
+            self.loop.run_until_complete(self.start())
+            self.loop.run_forever()
+        except KeyboardInterrupt:
+            self.loop.run_until_complete(self.stop())
@@ -0,0 +1,143 @@
+from typing import Any, Hashable, Iterator, List
+
+# 未设置的槽
+_MISSING = object()
+
+
+class Scope:
+    """
+    事件上下文, 常用键存放在槽中, 其余键(如Depends缓存)存放在extras, 兼容dict的访问方式
+    """
+    __slots__ = (
+        'request', 'app', 'router', 'deadline', 'context', 'sender', 'notice',
+        'text', 'at', 'face', 'json', 'json_data', 'image', 'record', 'video', 'file', 'reply',
+        'message_chain', 'segments', 'full_text',
+        'extras',
+    )
+
+    def __init__(self, request: dict = None, app=None, router=None):
+        self.reset()
+        self.request = request
+        self.app = app
+        self.router = router
+
+    def reset(self):
+        for name in FIELDS:
+            setattr(self, name, _MISSING)
+        self.extras = None
+
+    def __getitem__(self, key: Hashable) -> Any:
+        if key in FIELDS:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self.extras is not None:
+            return self.extras[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: Hashable, value: Any):
+        if key in FIELDS:
+            setattr(self, key, value)
+            return
+        if self.extras is None:
+            self.extras = {}
+        self.extras[key] = value
+
+    def __delitem__(self, key: Hashable):
+        if key in FIELDS:
+            if getattr(self, key) is _MISSING:
+                raise KeyError(key)
+            setattr(self, key, _MISSING)
+        elif self.extras is not None:
+            del self.extras[key]
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: Hashable) -> bool:
+        if key in FIELDS:
+            return getattr(self, key) is not _MISSING
+        return self.extras is not None and key in self.extras
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for name in FIELDS:
+            if getattr(self, name) is not _MISSING:
+                yield name
+        if self.extras is not None:
+            yield from self.extras
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if key in FIELDS:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self.extras is None:
+            return default
+        return self.extras.get(key, default)
+
+    def setdefault(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self:
+            self[key] = default
+            return default
+        return self[key]
+
+    def pop(self, key: Hashable, *default: Any) -> Any:
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def __repr__(self) -> str:
+        return f'Scope({dict(self.items())!r})'
+
+
+FIELDS = frozenset(Scope.__slots__) - {'extras'}
+
+
+class ScopePool:
+    """
+    事件上下文对象池, 处理完成后归还复用, 避免每个事件重新分配
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        :param maxsize: 池中最多保留的空闲对象数
+        """
+        self.maxsize = maxsize
+        self.free: List[Scope] = []
+        # 统计
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, request: dict, app=None, router=None) -> Scope:
+        if self.free:
+            scope = self.free.pop()
+            scope.request = request
+            scope.app = app
+            scope.router = router
+            self.reused += 1
+            return scope
+        self.created += 1
+        return Scope(request, app, router)
+
+    def release(self, scope: Scope):
+        """
+        归还对象, 只清空引用; 消息链等容器可能仍被处理器持有, 不复用
+        """
+        if len(self.free) >= self.maxsize:
+            return
+        scope.reset()
+        self.free.append(scope)
+
+
+SCOPE_POOL = ScopePool()
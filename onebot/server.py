@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import hmac
+from typing import Callable, Dict, Optional
+
+import websockets
+from loguru import logger
+
+from onebot.application import OneBot
+from onebot.runtime import MultiBot
+
+
+def _headers(ws):
+    """
+    兼容新旧版本 websockets 的握手请求头
+    """
+    request = getattr(ws, 'request', None)
+    if request is not None:
+        return request.headers
+    return ws.request_headers
+
+
+def _access_token(headers, query: str = '') -> Optional[str]:
+    """
+    从 Authorization 头或 access_token 查询参数中取访问令牌
+    """
+    authorization = headers.get('Authorization')
+    if authorization:
+        scheme, _, token = authorization.partition(' ')
+        return token if scheme.lower() in ('bearer', 'token') else authorization
+    for item in query.split('&'):
+        key, _, value = item.partition('=')
+        if key == 'access_token':
+            return value
+    return None
+
+
+# 持有连接、队列或计数的参数, 每个账号需要各自的实例
+_STATEFUL_OPTIONS = ('pipeline', 'pool', 'scheduler', 'cache', 'health')
+
+
+class OneBotServer(MultiBot):
+    """
+    服务端运行时, 接收 OneBot 实现主动发起的反向WebSocket连接和HTTP上报,
+    每个 X-Self-ID 对应一个被动模式的 OneBot, 共享路由和事件分发器
+    """
+
+    def __init__(
+            self,
+            host: str = '0.0.0.0',
+            port: int = 8080,
+            token: str = None,
+            http_port: int = None,
+            secret: str = None,
+            max_body_size: int = 1 << 20,
+            options: Callable[[int], dict] = None,
+            **kwargs
+    ):
+        """
+        :param host:        监听地址
+        :param port:        反向WebSocket端口
+        :param token:       访问令牌, 校验客户端的 Authorization 头
+        :param http_port:   HTTP上报端口, 为空时不启用
+        :param secret:      HTTP上报签名密钥, 校验 X-Signature 头
+        :param max_body_size: HTTP上报请求体上限(字节), 超出时返回413
+        :param options:     按账号QQ号返回 OneBot 参数的方法, 每个账号接入时调用一次,
+                            pipeline、pool、scheduler、cache、health 等有状态参数只能由此创建
+        :param kwargs:      被动模式 OneBot 的其余参数, 所有账号共用
+
+        HTTP上报只用于接收事件, 仅通过HTTP上报接入的账号没有动作连接, 调用 send_group_msg 等动作会立即抛出
+        ConnectionLostError; 需要回复时客户端应同时配置反向WebSocket(Universal 或 API 角色)
+        """
+        shared = [name for name in _STATEFUL_OPTIONS if name in kwargs]
+        if shared:
+            raise ValueError(f'{", ".join(shared)} 不能在账号间共享, 请通过 options 为每个账号创建')
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.token = token
+        self.http_port = http_port
+        self.secret = secret
+        self.max_body_size = max_body_size
+        self.options = kwargs
+        self.account_options = options
+        # self_id -> 账号
+        self.accounts: Dict[int, OneBot] = {}
+        self.servers = []
+
+    async def account(self, self_id: int) -> OneBot:
+        """
+        获取账号, 首次接入时创建并启动
+        :param self_id: 机器人QQ号
+        """
+        bot = self.accounts.get(self_id)
+        if bot is None:
+            options = dict(self.options)
+            if self.account_options is not None:
+                options.update(self.account_options(self_id))
+            bot = OneBot(router=self.router, **options)
+            self.accounts[self_id] = bot
+            self.bots.append(bot)
+            await bot.start()
+            logger.info('账号 {} 已接入', self_id)
+        return bot
+
+    def _self_id(self, headers) -> Optional[int]:
+        try:
+            return int(headers.get('X-Self-ID'))
+        except (TypeError, ValueError):
+            return None
+
+    async def _serve_ws(self, ws, path: str = None):
+        """
+        反向WebSocket连接处理, 旧版 websockets 会额外传入路径
+        """
+        headers = _headers(ws)
+        if path is None:
+            path = getattr(getattr(ws, 'request', None), 'path', '')
+        if self.token and _access_token(headers, path.partition('?')[2]) != self.token:
+            await ws.close(1008, 'unauthorized')
+            return
+        self_id = self._self_id(headers)
+        if self_id is None:
+            await ws.close(1008, 'missing X-Self-ID')
+            return
+        # API、Universal 角色的连接用于发送动作, Event 角色只上报事件
+        role = headers.get('X-Client-Role', 'Universal')
+        logger.info('反向websocket连接: {} ({})', self_id, role)
+        bot = await self.account(self_id)
+        await bot.attach(ws, actions=role != 'Event')
+
+    async def _serve_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        HTTP上报处理, 每个请求处理完即关闭连接
+        """
+        try:
+            request_line = await reader.readline()
+            method, _, _ = request_line.decode('latin-1').partition(' ')
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            if length < 0:
+                status = '400 Bad Request'
+            elif length > self.max_body_size:
+                status = '413 Payload Too Large'
+            else:
+                body = await reader.readexactly(length)
+                status = await self._handle_post(method, headers, body)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            status = '400 Bad Request'
+        try:
+            writer.write(f'HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'.encode())
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_post(self, method: str, headers: dict, body: bytes) -> str:
+        if method != 'POST':
+            return '405 Method Not Allowed'
+        if self.secret:
+            signature = 'sha1=' + hmac.new(self.secret.encode(), body, hashlib.sha1).hexdigest()
+            if not hmac.compare_digest(signature, headers.get('x-signature', '')):
+                return '403 Forbidden'
+        self_id = self._self_id({'X-Self-ID': headers.get('x-self-id')})
+        if self_id is None:
+            return '400 Bad Request'
+        bot = await self.account(self_id)
+        await bot.receive(body)
+        return '204 No Content'
+
+    async def start(self):
+        """
+        启动正向连接的账号并开始监听
+        """
+        await super().start()
+        self.servers.append(await websockets.serve(self._serve_ws, self.host, self.port))
+        logger.info('反向websocket监听 ws://{}:{}', self.host, self.port)
+        if self.http_port is not None:
+            self.servers.append(await asyncio.start_server(self._serve_http, self.host, self.http_port))
+            logger.info('HTTP上报监听 http://{}:{}', self.host, self.http_port)
+
+    async def stop(self):
+        for server in self.servers:
+            server.close()
+        self.servers = []
+        await super().stop()
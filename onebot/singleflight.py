@@ -0,0 +1,37 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    合并相同的并发请求, 同一时刻同一个键只执行一次, 其余调用共享结果
+    """
+
+    def __init__(self):
+        self.calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self):
+        return len(self.calls)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable], timeout: Optional[float] = None) -> Any:
+        """
+        :param key:     请求标识
+        :param factory: 创建请求的方法, 仅在没有相同请求进行中时调用
+        :param timeout: 当前调用方的等待时间, 超时只影响该调用方
+        :return:
+        """
+        future = self.calls.get(key)
+        if future is None:
+            # 共享请求在空白上下文中执行, 不继承首个调用方的截止时间等上下文变量
+            future = contextvars.Context().run(asyncio.ensure_future, factory())
+            self.calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        # 单个调用方取消或超时不影响其他等待者
+        if timeout is None:
+            return await asyncio.shield(future)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self.calls.get(key) is future:
+            del self.calls[key]
@@ -0,0 +1,68 @@
+"""
+动作超时与事件截止时间
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+# 当前事件的截止时间, 取值为事件循环时间
+DEADLINE: ContextVar[Optional[float]] = ContextVar('onebot_deadline', default=None)
+
+
+class TimeoutPolicy:
+    """
+    按动作配置超时时间
+    """
+    # 耗时较长的动作
+    DEFAULTS: Dict[str, float] = {
+        'get_group_member_list': 30,
+        'get_friend_list': 30,
+        'get_group_list': 30,
+        'get_image': 30,
+        'get_record': 30,
+        'get_file': 60,
+        'send_like': 5,
+    }
+
+    def __init__(self, default: float = 10, actions: Dict[str, float] = None):
+        """
+        :param default: 默认超时时间(秒)
+        :param actions: 动作 -> 超时时间, 覆盖内置配置
+        """
+        self.default = default
+        self.actions = dict(self.DEFAULTS)
+        if actions:
+            self.actions.update(actions)
+
+    def get(self, action: str) -> float:
+        return self.actions.get(action, self.default)
+
+
+def remaining(timeout: float) -> float:
+    """
+    根据当前截止时间收紧超时时间
+    :param timeout: 动作超时时间
+    :return: 剩余可用时间, 已超过截止时间时小于等于0
+    """
+    deadline = DEADLINE.get()
+    if deadline is None:
+        return timeout
+    return min(timeout, deadline - asyncio.get_event_loop().time())
+
+
+@contextmanager
+def deadline(timeout: float):
+    """
+    限定代码块内所有动作的截止时间, 不会延长外层截止时间
+    :param timeout: 秒
+    """
+    value = asyncio.get_event_loop().time() + timeout
+    current = DEADLINE.get()
+    if current is not None:
+        value = min(value, current)
+    token = DEADLINE.set(value)
+    try:
+        yield value
+    finally:
+        DEADLINE.reset(token)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from collections import deque
 from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from onebot.exceptionals import BuildMessageError
 from onebot.types.enum import Gender, GroupRole
@@ -144,6 +144,167 @@ class GroupInviteRequest(BaseModel):
     sub_type: str
 
 
+class Notice(BaseModel):
+    """
+    通知事件
+    """
+    # 时间戳
+    time: int
+    # 机器人QQ号
+    self_id: int
+    # 通知类型
+    notice_type: str
+
+
+class OtherNotice(Notice):
+    """
+    未单独建模的通知事件, 保留上报的全部字段, 可按属性访问, 如notice.sub_type
+    """
+    model_config = ConfigDict(extra='allow')
+
+
+class GroupUploadFile(BaseModel):
+    """
+    群文件信息
+    """
+    # 文件ID
+    id: str
+    # 文件名
+    name: str
+    # 文件大小(字节数)
+    size: int
+    # busid
+    busid: int
+
+
+class GroupUpload(Notice):
+    """
+    群文件上传
+    """
+    # 群号
+    group_id: int
+    # 发送者QQ号
+    user_id: int
+    # 文件信息
+    file: GroupUploadFile
+
+
+class GroupAdmin(Notice):
+    """
+    群管理员变动
+    """
+    # 事件子类型, set、unset
+    sub_type: str
+    # 群号
+    group_id: int
+    # 管理员QQ号
+    user_id: int
+
+
+class GroupDecrease(Notice):
+    """
+    群成员减少
+    """
+    # 事件子类型, leave、kick、kick_me
+    sub_type: str
+    # 群号
+    group_id: int
+    # 操作者QQ号, 主动退群时与user_id相同
+    operator_id: int
+    # 离开者QQ号
+    user_id: int
+
+
+class GroupIncrease(Notice):
+    """
+    群成员增加
+    """
+    # 事件子类型, approve、invite
+    sub_type: str
+    # 群号
+    group_id: int
+    # 操作者QQ号
+    operator_id: int
+    # 加入者QQ号
+    user_id: int
+
+
+class GroupBan(Notice):
+    """
+    群禁言
+    """
+    # 事件子类型, ban、lift_ban
+    sub_type: str
+    # 群号
+    group_id: int
+    # 操作者QQ号
+    operator_id: int
+    # 被禁言QQ号, 全员禁言时为0
+    user_id: int
+    # 禁言时长(秒)
+    duration: int
+
+
+class FriendAdd(Notice):
+    """
+    好友添加
+    """
+    # 新好友QQ号
+    user_id: int
+
+
+class GroupRecall(Notice):
+    """
+    群消息撤回
+    """
+    # 群号
+    group_id: int
+    # 消息发送者QQ号
+    user_id: int
+    # 操作者QQ号
+    operator_id: int
+    # 被撤回的消息ID
+    message_id: int
+
+
+class FriendRecall(Notice):
+    """
+    好友消息撤回
+    """
+    # 好友QQ号
+    user_id: int
+    # 被撤回的消息ID
+    message_id: int
+
+
+class Poke(Notice):
+    """
+    戳一戳
+    """
+    # 事件子类型
+    sub_type: str
+    # 群号, 私聊戳一戳时为空
+    group_id: Optional[int] = None
+    # 发送者QQ号
+    user_id: int
+    # 被戳者QQ号
+    target_id: int
+
+
+class GroupCard(Notice):
+    """
+    群名片变更
+    """
+    # 群号
+    group_id: int
+    # 成员QQ号
+    user_id: int
+    # 新名片
+    card_new: str
+    # 旧名片
+    card_old: str
+
+
 class Login(BaseModel):
     """
     登录信息
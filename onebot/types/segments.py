@@ -0,0 +1,181 @@
+"""
+轻量消息段类型, 字段与 onebot.types.models 中的同名模型一致, 仅做必要的类型转换, 不做完整校验,
+用于高频入站消息的解析; API 响应仍使用 pydantic 模型
+"""
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class Segment(ABC):
+    __slots__ = ()
+
+    @classmethod
+    @abstractmethod
+    def model_validate(cls, data: dict) -> 'Segment':
+        """
+        由消息段的data创建
+        """
+        pass
+
+    def model_dump(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and self.model_dump() == other.model_dump()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Text(Segment):
+    """
+    文本
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        # 文本内容
+        self.text = text
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'Text':
+        return cls(data['text'])
+
+
+class Face(Segment):
+    """
+    表情
+    """
+    __slots__ = ('id',)
+
+    def __init__(self, id: str):
+        # 表情ID
+        self.id = id
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'Face':
+        return cls(str(data['id']))
+
+
+class Image(Segment):
+    """
+    图片
+    """
+    __slots__ = ('file', 'url', 'file_size')
+
+    def __init__(self, file: str, url: Optional[str], file_size: int):
+        # 图片文件名
+        self.file = file
+        # 图片 URL
+        self.url = url
+        # 图片大小
+        self.file_size = file_size
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'Image':
+        return cls(data['file'], data.get('url'), int(data['file_size']))
+
+
+class Record(Segment):
+    """
+    语音
+    """
+    __slots__ = ('file', 'path', 'file_size')
+
+    def __init__(self, file: str, path: Optional[str] = None, file_size: Optional[int] = 0):
+        # 语音文件名
+        self.file = file
+        # 语音存放路径
+        self.path = path
+        # 文件大小
+        self.file_size = file_size
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'Record':
+        file_size = data.get('file_size', 0)
+        return cls(data['file'], data.get('path'), None if file_size is None else int(file_size))
+
+
+class Video(Segment):
+    """
+    视频
+    """
+    __slots__ = ('file', 'path', 'file_id', 'file_size')
+
+    def __init__(self, file: str, path: str, file_id: str, file_size: int):
+        # 视频文件名
+        self.file = file
+        # 视频路径
+        self.path = path
+        # 文件ID
+        self.file_id = file_id
+        # 文件大小
+        self.file_size = file_size
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'Video':
+        return cls(data['file'], data['path'], data['file_id'], int(data['file_size']))
+
+
+class File(Segment):
+    """
+    文件
+    """
+    __slots__ = ('file', 'path', 'file_id', 'file_size')
+
+    def __init__(self, file: str, path: str, file_id: str, file_size: int):
+        # 文件名
+        self.file = file
+        # 文件路径
+        self.path = path
+        # 文件ID
+        self.file_id = file_id
+        # 文件大小
+        self.file_size = file_size
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'File':
+        return cls(data['file'], data['path'], data['file_id'], int(data['file_size']))
+
+
+class At(Segment):
+    """
+    At
+    """
+    __slots__ = ('qq',)
+
+    def __init__(self, qq: str):
+        self.qq = qq
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'At':
+        return cls(str(data['qq']))
+
+
+class Json(Segment):
+    """
+    Json
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data: str):
+        self.data = data
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'Json':
+        return cls(data['data'])
+
+
+class Reply(Segment):
+    """
+    消息回复
+    """
+    __slots__ = ('id',)
+
+    def __init__(self, id: int):
+        self.id = id
+
+    @classmethod
+    def model_validate(cls, data: dict) -> 'Reply':
+        return cls(int(data['id']))
@@ -0,0 +1,248 @@
+"""
+多进程事件处理
+"""
+import asyncio
+import importlib
+import multiprocessing
+import sys
+import threading
+from itertools import count
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from loguru import logger
+
+from onebot.cache import MetadataCache
+from onebot.exceptionals import ConnectionLostError, SendMessageError
+from onebot.pipeline import ShardedPipeline, conversation_key
+
+# 工作进程中的动作转发器, 主进程中为None
+_relay: Optional['ActionRelay'] = None
+
+# 异常类型在进程间按名称传递
+_ERRORS = {
+    'TimeoutError': asyncio.TimeoutError,
+    'ConnectionLostError': ConnectionLostError,
+}
+
+
+def current_relay() -> Optional['ActionRelay']:
+    return _relay
+
+
+class ActionRelay:
+    """
+    工作进程中的动作转发器, 动作交由主进程通过连接发送
+    """
+
+    def __init__(self, index: int, outbox, loop: asyncio.AbstractEventLoop):
+        self.index = index
+        self.outbox = outbox
+        self.loop = loop
+        self._counter = count(1)
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    async def call(self, message: dict, priority: int, timeout: float) -> dict:
+        call_id = next(self._counter)
+        future = self.loop.create_future()
+        self.pending[call_id] = future
+        try:
+            self.outbox.put((self.index, call_id, message, int(priority), timeout))
+            return await future
+        finally:
+            self.pending.pop(call_id, None)
+
+    def resolve(self, call_id: int, response: Optional[dict], error: Optional[tuple]):
+        future = self.pending.get(call_id)
+        if future is None or future.done():
+            return
+        if error is None:
+            future.set_result(response)
+        else:
+            name, msg = error
+            exc_type = _ERRORS.get(name)
+            future.set_exception(exc_type() if exc_type is not None else SendMessageError(msg))
+
+
+def _load_router(target: Tuple[str, str]):
+    """
+    在工作进程中重新导入注册路由的模块, 取出其中的路由
+    """
+    module_name, attr = target
+    if module_name == '__main__':
+        # spawn 会以 __mp_main__ 的名义重新执行主模块(不含 if __name__ == '__main__' 部分)
+        module = sys.modules['__mp_main__']
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, attr).router
+
+
+def _worker_main(index: int, inbox, outbox, target: Tuple[str, str], options: dict, concurrency: int):
+    from onebot.application import OneBot
+
+    async def main():
+        global _relay
+        loop = asyncio.get_running_loop()
+        _relay = ActionRelay(index, outbox, loop)
+        # 工作进程中的app只负责处理事件, 动作由连接进程代发
+        app = OneBot(router=_load_router(target), **options)
+        # 进程内同一会话依旧按顺序处理
+        pipeline = ShardedPipeline(workers=concurrency)
+        pipeline.start(app._dispatch)
+        stopped = loop.create_future()
+
+        def receive():
+            while True:
+                item = inbox.get()
+                if item is None:
+                    loop.call_soon_threadsafe(stopped.set_result, None)
+                    return
+                if item[0] == 'event':
+                    asyncio.run_coroutine_threadsafe(pipeline.put(item[1]), loop)
+                elif item[0] == 'invalidate':
+                    loop.call_soon_threadsafe(app.cache.invalidate_notice, item[1])
+                else:
+                    loop.call_soon_threadsafe(_relay.resolve, *item[1:])
+
+        threading.Thread(target=receive, daemon=True).start()
+        await stopped
+        await pipeline.stop()
+
+    asyncio.run(main())
+
+
+def locate(app) -> Tuple[str, str]:
+    """
+    查找持有app路由的模块级变量, 如 OneBot、MultiBot、OneBotServer 实例
+    :return: 模块名, 变量名
+    """
+    modules = ['__main__'] + sorted({route.func.__module__ for route in app.router.routes})
+    for module_name in modules:
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for attr, value in vars(module).items():
+            if getattr(value, 'router', None) is app.router:
+                return module_name, attr
+    raise ValueError('未找到持有路由的模块级变量, 请通过 target 参数指定, 如 "mybot:onebot"')
+
+
+class ProcessPipeline:
+    """
+    多进程事件处理管道, 连接所在进程按会话将事件分发到工作进程, 工作进程中的动作由连接进程代发
+
+    工作进程通过spawn创建, 重新导入注册路由的模块取得路由, 因此 OneBot、MultiBot 等实例须定义为模块级变量,
+    启动代码须放在 if __name__ == '__main__' 中
+    """
+
+    def __init__(
+            self,
+            processes: int = None,
+            concurrency: int = 16,
+            key: Callable[[dict], Optional[Hashable]] = conversation_key,
+            target: str = None
+    ):
+        """
+        :param processes:   工作进程数, 默认CPU核数
+        :param concurrency: 每个工作进程内的并发处理数
+        :param key:         会话键, 同一会话固定由同一个进程处理, 返回None的事件轮询分配
+        :param target:      持有路由的模块级变量, 格式为 "模块:变量名", 为空时自动查找
+        """
+        self.processes = processes or multiprocessing.cpu_count()
+        self.concurrency = concurrency
+        self.key = key
+        self.target = tuple(target.split(':', 1)) if target else None
+        self._round_robin = count()
+        self.inboxes: list = []
+        self.outbox = None
+        self.workers: List[multiprocessing.Process] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.app = None
+        self.dispatched = 0
+        self.relayed = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(inbox.qsize() for inbox in self.inboxes)
+
+    def stats(self) -> dict:
+        return {
+            'processes': self.processes,
+            'depth': self.depth,
+            'dispatched': self.dispatched,
+            'relayed': self.relayed,
+        }
+
+    def start(self, handler: Callable[[dict], Awaitable]):
+        """
+        创建工作进程
+        :param handler: OneBot._dispatch, 工作进程按其路由和配置创建处理事件的app
+        """
+        if self.workers:
+            return
+        # spawn 不继承父进程的线程和锁, 已有线程运行时创建也是安全的
+        context = multiprocessing.get_context('spawn')
+        self.loop = asyncio.get_event_loop()
+        self.app = handler.__self__
+        target = self.target or locate(self.app)
+        options = {
+            'lazy_segments': self.app.lazy_segments,
+            'event_timeout': self.app.event_timeout,
+            'timeouts': self.app.timeouts,
+            'coalesce': self.app.singleflight is not None,
+        }
+        if self.app.cache is not None:
+            # 每个工作进程各自缓存, 通知事件同时广播给各进程用于失效
+            options['cache'] = MetadataCache(self.app.cache.ttl, self.app.cache.maxsize)
+        self.outbox = context.Queue()
+        self.inboxes = [context.Queue() for _ in range(self.processes)]
+        for index, inbox in enumerate(self.inboxes):
+            process = context.Process(
+                target=_worker_main,
+                args=(index, inbox, self.outbox, target, options, self.concurrency),
+                daemon=True
+            )
+            process.start()
+            self.workers.append(process)
+        threading.Thread(target=self._receive_actions, daemon=True).start()
+        logger.info('工作进程已启动, 进程数: {}', self.processes)
+
+    async def put(self, request: dict):
+        key = self.key(request)
+        index = (next(self._round_robin) if key is None else hash(key)) % len(self.inboxes)
+        self.inboxes[index].put(('event', request))
+        self.dispatched += 1
+        # 处理通知的进程自行失效缓存, 其余进程只做失效
+        if self.app.cache is not None and request.get('post_type') == 'notice':
+            for other, inbox in enumerate(self.inboxes):
+                if other != index:
+                    inbox.put(('invalidate', request))
+
+    async def stop(self):
+        if not self.workers:
+            return
+        self.outbox.put(None)
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for process in self.workers:
+            await asyncio.to_thread(process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        self.workers = []
+        self.inboxes = []
+
+    def _receive_actions(self):
+        while True:
+            item = self.outbox.get()
+            if item is None:
+                return
+            self.loop.call_soon_threadsafe(lambda args=item: self.loop.create_task(self._execute(*args)))
+
+    async def _execute(self, index: int, call_id: int, message: dict, priority: int, timeout: float):
+        self.relayed += 1
+        try:
+            response = await self.app._send_message(message, priority, timeout)
+            reply = ('response', call_id, response, None)
+        except Exception as e:
+            reply = ('response', call_id, None, (type(e).__name__, str(e)))
+        if index < len(self.inboxes):
+            self.inboxes[index].put(reply)
@@ -21,5 +21,8 @@ setuptools.setup(
         'pydantic',
         'aiocron'
     ],
+    extras_require={
+        'speedups': ['orjson'],
+    },
     python_requires='>=3.7'
 )